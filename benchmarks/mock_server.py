@@ -0,0 +1,255 @@
+"""Local stand-in for the Check Point Management `/web_api`.
+
+Serves just enough of the API for CheckPointApiClient and the coordinators to
+run end to end: login/logout/keepalive, paginated show-* object calls, nested
+access and NAT rulebases with hits, set-access-rule, publish, install-policy and
+show-task. Object counts, per-request latency and error injection are
+configurable, and every request and response byte is counted.
+"""
+import asyncio
+import json
+import random
+import uuid
+from aiohttp import web
+
+OBJECT_ENDPOINTS = {
+    "show-hosts": "host",
+    "show-networks": "network",
+    "show-groups": "group",
+    "show-dynamic-objects": "dynamic-object",
+    "show-security-zones": "security-zone",
+    "show-data-center-objects": "data-center-object",
+    "show-updatable-objects": "updatable-object",
+    "show-vpn-communities-meshed": "vpn-community-meshed",
+    "show-vpn-communities-star": "vpn-community-star",
+    "show-vpn-communities-remote-access": "vpn-community-remote-access",
+}
+
+GATEWAY_TYPES = ("simple-gateway", "CpmiClusterMember", "CpmiGatewayCluster", "CpmiHostCkp")
+
+SECTION_SIZE = 50
+
+def _ref(obj_type, name):
+    return {"uid": str(uuid.uuid5(uuid.NAMESPACE_DNS, name)), "name": name, "type": obj_type}
+
+ANY = _ref("CpmiAnyObject", "Any")
+ACCEPT = _ref("RulebaseAction", "Accept")
+DROP = _ref("RulebaseAction", "Drop")
+LOG = {"type": "Log", "per-connection": True, "accounting": False}
+
+class MockManagementServer:
+    def __init__(self, objects=1000, rules=500, layers=2, gateways=10, latency=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.package = "Standard"
+        self.revision = str(uuid.uuid4())
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.calls = {}
+        self.tasks = {}
+        self.publishing = set()
+
+        self.objects = {
+            endpoint: [_ref(obj_type, f"{obj_type}_{i}") for i in range(objects)]
+            for endpoint, obj_type in OBJECT_ENDPOINTS.items()
+        }
+        self.gateways = [
+            _ref(GATEWAY_TYPES[i % len(GATEWAY_TYPES)], f"gw_{i}") for i in range(gateways)
+        ]
+
+        self.layers = [f"Layer {i}" if i else "Network" for i in range(layers)]
+        per_layer = max(1, rules // layers)
+        hosts = self.objects["show-hosts"]
+        self.rules = {}
+        for layer in self.layers:
+            self.rules[layer] = [
+                {
+                    "uid": str(uuid.uuid4()),
+                    "type": "access-rule",
+                    "name": f"{layer} rule {i + 1}",
+                    "rule-number": i + 1,
+                    "enabled": bool(i % 7),
+                    "source": [hosts[i % len(hosts)]] if hosts and i % 3 else [ANY],
+                    "destination": [hosts[(i * 7) % len(hosts)]] if hosts and i % 2 else [ANY],
+                    "service": [ANY],
+                    "action": ACCEPT if i % 5 else DROP,
+                    "track": LOG,
+                    "comments": "",
+                    "meta-info": {"last-modify-time": {"posix": 0}, "creator": "admin"},
+                    "hits": {"value": 0, "percentage": "0%", "level": "zero"},
+                }
+                for i in range(per_layer)
+            ]
+
+        # One inline layer under the second rule of the first layer, which is not listed on the package
+        inline = f"{self.layers[0]} inline"
+        parent = self.rules[self.layers[0]][min(1, per_layer - 1)]
+        parent.update(action=_ref("RulebaseAction", "Apply Layer"), **{"inline-layer": _ref("access-layer", inline)})
+        self.rules[inline] = [
+            {"uid": str(uuid.uuid4()), "type": "access-rule", "name": f"{inline} rule {i + 1}", "rule-number": i + 1,
+             "enabled": True, "source": [ANY], "destination": [ANY], "service": [ANY], "action": ACCEPT, "track": LOG,
+             "hits": {"value": 0, "percentage": "0%", "level": "zero"}}
+            for i in range(3)
+        ]
+        self.nat_rules = [
+            {"uid": str(uuid.uuid4()), "type": "nat-rule", "rule-number": i + 1, "name": f"NAT {i + 1}"}
+            for i in range(max(1, rules // 10))
+        ]
+
+    def reset_counters(self):
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.calls = {}
+
+    def tick_hits(self):
+        for rules in self.rules.values():
+            for rule in rules:
+                rule["hits"] = {**rule["hits"], "value": rule["hits"]["value"] + self.random.randint(0, 3)}
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/web_api/{endpoint}", self._handle)
+        return app
+
+    async def _handle(self, request):
+        endpoint = request.match_info["endpoint"]
+        body = await request.read()
+        self.requests += 1
+        self.bytes_in += len(body)
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if endpoint != "login" and self.error_rate and self.random.random() < self.error_rate:
+            return web.json_response({"code": "generic_error", "message": "Injected error"}, status=500)
+        if endpoint != "login" and not request.headers.get("X-chkp-sid"):
+            return web.json_response({"code": "generic_err_wrong_session_id"}, status=401)
+
+        payload = json.loads(body or b"{}")
+        handler = getattr(self, "_" + endpoint.replace("-", "_"), None)
+        if handler is None:
+            if endpoint not in OBJECT_ENDPOINTS:
+                return web.json_response({"code": "generic_err_command_not_found"}, status=404)
+            data = self._paged(self.objects[endpoint], "objects", payload)
+        else:
+            data = handler(payload)
+
+        text = json.dumps(data)
+        self.bytes_out += len(text)
+        return web.Response(text=text, content_type="application/json")
+
+    @staticmethod
+    def _page(items, payload):
+        offset = payload.get("offset", 0)
+        limit = payload.get("limit", 50)
+        return items[offset:offset + limit], offset
+
+    def _paged(self, items, key, payload):
+        page, offset = self._page(items, payload)
+        if payload.get("details-level") == "uid":
+            page = [item["uid"] for item in page]
+        return {key: page, "from": offset + 1, "to": offset + len(page), "total": len(items)}
+
+    def _rulebase(self, rules, payload, name):
+        page, offset = self._page(rules, payload)
+        if payload.get("details-level") == "uid":
+            page = [
+                {"uid": rule["uid"], "type": rule["type"], "rule-number": rule["rule-number"], "hits": rule.get("hits")}
+                for rule in page
+            ]
+        if not payload.get("show-hits"):
+            page = [{k: v for k, v in rule.items() if k != "hits"} for rule in page]
+
+        # Group the page into sections the way the real rulebase nests them
+        sections = {}
+        for rule in page:
+            section = (rule["rule-number"] - 1) // SECTION_SIZE
+            sections.setdefault(section, []).append(rule)
+        rulebase = [
+            {"type": "access-section", "name": f"Section {section + 1}", "rulebase": section_rules}
+            for section, section_rules in sections.items()
+        ]
+        return {"name": name, "rulebase": rulebase, "from": offset + 1, "to": offset + len(page), "total": len(rules)}
+
+    def _login(self, payload):
+        return {"sid": str(uuid.uuid4()), "session-timeout": payload.get("session-timeout", 600)}
+
+    def _logout(self, payload):
+        return {"message": "OK"}
+
+    def _keepalive(self, payload):
+        return {"message": "OK"}
+
+    def _show_last_published_session(self, payload):
+        return {"uid": self.revision, "type": "session"}
+
+    def _show_packages(self, payload):
+        return self._paged([{"name": self.package, "uid": "pkg"}], "packages", payload)
+
+    def _show_package(self, payload):
+        return {"name": self.package, "access-layers": [{"name": layer} for layer in self.layers]}
+
+    def _show_access_layers(self, payload):
+        return self._paged([{"name": layer, "uid": layer} for layer in self.layers], "access-layers", payload)
+
+    def _show_access_rulebase(self, payload):
+        return self._rulebase(self.rules.get(payload.get("name"), []), payload, payload.get("name"))
+
+    def _show_nat_rulebase(self, payload):
+        return self._rulebase(self.nat_rules, payload, self.package)
+
+    def _show_access_rule(self, payload):
+        for rule in self.rules.get(payload.get("layer"), []):
+            if rule["uid"] == payload.get("uid"):
+                return rule
+        return {}
+
+    def _show_gateways_and_servers(self, payload):
+        return self._paged(self.gateways, "objects", payload)
+
+    def _set_access_rule(self, payload):
+        rule = self._show_access_rule(payload)
+        if "enabled" in payload:
+            rule["enabled"] = payload["enabled"]
+        return rule
+
+    def _publish(self, payload):
+        # Like the real server, the new revision only appears once the publish task has finished
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = 0
+        self.publishing.add(task_id)
+        return {"task-id": task_id}
+
+    def _discard(self, payload):
+        return {"number-of-discarded-changes": 0}
+
+    def _install_policy(self, payload):
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = 0
+        return {"task-id": task_id}
+
+    def _show_task(self, payload):
+        task_id = payload.get("task-id")
+        progress = self.tasks[task_id] = min(100, self.tasks.get(task_id, 0) + 50)
+        status = "succeeded" if progress == 100 else "in progress"
+        if status == "succeeded" and task_id in self.publishing:
+            self.publishing.discard(task_id)
+            self.revision = str(uuid.uuid4())
+        return {"tasks": [{"task-id": task_id, "status": status, "progress-percentage": progress}]}
+
+    def _verify_management_license(self, payload):
+        return {"license-status": "valid", "message": "License is valid"}
+
+    def _show_cloud_services(self, payload):
+        return {"status": "Connected", "connected-at": {"iso-8601": "2024-01-01T00:00"}}
+
+async def start(server, host="127.0.0.1", port=0):
+    """Start `server` on a local port and return (runner, port)."""
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
@@ -0,0 +1,78 @@
+"""Synthetic Check Point notifications for exercising push mode offline.
+
+Builds the audit, publish and traffic log records that Log Exporter would
+send, in syslog (key:"value") or CEF form, and sends them to the
+integration's UDP listener or as JSON to its webhook.
+
+Usage:
+
+    python -m benchmarks.push_events --udp 127.0.0.1:5514 --rule-uid <uid>
+    python -m benchmarks.push_events --webhook http://ha:8123/api/webhook/<id> --rule-uid <uid> --hit
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import aiohttp
+
+def syslog_line(fields):
+    body = "; ".join(f'{key}:"{value}"' for key, value in fields.items())
+    return f"<134>1 2024-01-01T00:00:00Z mgmt CheckPoint 1 - [{body}]"
+
+def cef_line(fields, name="Log"):
+    extension = []
+    for i, (key, value) in enumerate(fields.items(), 1):
+        extension.append(f"cs{i}Label={key} cs{i}={value}")
+    return f"CEF:0|Check Point|SmartConsole|Check Point|Log|{name}|Unknown|" + " ".join(extension)
+
+def audit_event(rule_uid, operation="Modify Rule", administrator="admin"):
+    return {"operation": operation, "administrator": administrator, "objecttype": "access-rule", "uid": "{" + rule_uid.upper() + "}"}
+
+def publish_event(administrator="admin"):
+    return {"operation": "Publish", "administrator": administrator}
+
+def hit_event(rule_uid, action="Accept"):
+    return {"action": action, "rule_uid": rule_uid, "src": "10.0.0.1", "dst": "10.0.0.2", "service": "443"}
+
+def send_udp(lines, host, port):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for line in lines:
+            sock.sendto(line.encode(), (host, port))
+
+async def send_webhook(events, url):
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json={"events": events}) as response:
+            return response.status
+
+def build_events(args):
+    if args.hit:
+        return [hit_event(uid) for uid in args.rule_uid]
+    events = [audit_event(uid, args.operation) for uid in args.rule_uid]
+    if not args.no_publish:
+        events.append(publish_event())
+    return events
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--udp", help="host:port of the syslog listener")
+    parser.add_argument("--webhook", help="full webhook URL")
+    parser.add_argument("--rule-uid", nargs="*", default=[], help="rules the events refer to")
+    parser.add_argument("--operation", default="Modify Rule", help="audit operation for the rule events")
+    parser.add_argument("--hit", action="store_true", help="send traffic logs instead of audit + publish")
+    parser.add_argument("--no-publish", action="store_true", help="do not follow the audit records with a publish")
+    parser.add_argument("--cef", action="store_true", help="send CEF instead of syslog key/value lines")
+    args = parser.parse_args(argv)
+
+    events = build_events(args)
+    if args.udp:
+        host, port = args.udp.rsplit(":", 1)
+        send_udp([cef_line(event) if args.cef else syslog_line(event) for event in events], host, int(port))
+    if args.webhook:
+        print(asyncio.run(send_webhook(events, args.webhook)))
+    if not args.udp and not args.webhook:
+        for event in events:
+            print(cef_line(event) if args.cef else syslog_line(event))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
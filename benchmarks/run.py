@@ -0,0 +1,208 @@
+"""Offline benchmark for the Check Point Management integration.
+
+Starts the local mock `/web_api` from mock_server.py, drives CheckPointApiClient
+and the rules/objects/status coordinators end to end against it, and reports
+per scenario:
+
+* cold refresh: wall time, requests, bytes, peak Python memory
+* warm refresh: the same after hit counts moved but nothing was published
+* entity cost: time to evaluate every rule switch's state and attributes
+  after the warm refresh, as if every switch were enabled (attributes are
+  built on first use, so the initial build is reported separately as
+  attribute_build_ms), and how many of those writes change detection would
+  actually perform
+* with --push: time and requests from a synthetic audit + publish syslog
+  event (see push_events.py) until the edited rule shows its new state
+
+Usage (from the repository root, with Home Assistant installed):
+
+    python -m benchmarks.run --objects 100 1000 10000 --output results.json
+    python -m benchmarks.run --objects 1000 --baseline results.json
+
+With --baseline, any metric that got worse by more than --threshold (default
+20%) is reported and the run exits non-zero, so it can gate hot-path changes.
+The mock speaks plain HTTP, so TLS handshake cost is not part of the numbers.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from homeassistant.core import HomeAssistant
+from custom_components.checkpoint_management.api import CheckPointApiClient
+from custom_components.checkpoint_management.batch import CheckPointRuleBatcher
+from custom_components.checkpoint_management.coordinator import (
+    CheckPointRulesCoordinator, CheckPointObjectsCoordinator, CheckPointStatusCoordinator
+)
+from custom_components.checkpoint_management.push import CheckPointPushReceiver
+from custom_components.checkpoint_management.switch import CheckPointRuleSwitch
+from .mock_server import MockManagementServer, start
+from .push_events import audit_event, publish_event, send_udp, syslog_line
+
+# Lower is better for every metric we compare
+COMPARED_METRICS = (
+    "cold_refresh_s", "cold_requests", "cold_bytes", "peak_memory_mb",
+    "warm_refresh_s", "warm_requests", "warm_bytes", "entity_eval_ms", "push_latency_s", "push_requests",
+)
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def measure_push(hass, server, coordinator):
+    """Edit one rule on the mock, announce it like Log Exporter would, and time the targeted refresh."""
+    receiver = CheckPointPushReceiver(hass)
+    receiver.async_add_rules_coordinator(coordinator)
+    await receiver.async_start_syslog(0, "127.0.0.1")
+    try:
+        rule = server.rules[server.layers[0]][0]
+        rule["enabled"] = not rule["enabled"]
+        server.revision = str(uuid.uuid4())
+        server.reset_counters()
+
+        start_time = time.perf_counter()
+        send_udp([syslog_line(audit_event(rule["uid"])), syslog_line(publish_event())], "127.0.0.1", receiver.syslog_port)
+        while coordinator.data["rule_index"][rule["uid"]].enabled != rule["enabled"]:
+            if time.perf_counter() - start_time > 30:
+                return {"push_latency_s": None, "push_requests": server.requests}
+            await asyncio.sleep(0.01)
+        return {"push_latency_s": round(time.perf_counter() - start_time, 4), "push_requests": server.requests}
+    finally:
+        receiver.stop()
+
+async def run_scenario(objects, rules, layers, latency, error_rate, push=False):
+    server = MockManagementServer(objects=objects, rules=rules, layers=layers, latency=latency, error_rate=error_rate)
+    runner, port = await start(server)
+    hass = HomeAssistant(tempfile.mkdtemp())
+
+    api = CheckPointApiClient("127.0.0.1", port, "admin", "password")
+    api.base_url = f"http://127.0.0.1:{port}/web_api"
+    package = server.package
+    coordinators = {
+        "rules": CheckPointRulesCoordinator(hass, api, package, 60, hits_interval=0),
+        "objects": CheckPointObjectsCoordinator(hass, api, package, 600),
+        "status": CheckPointStatusCoordinator(hass, api, package, 3600),
+    }
+    result = {"objects": objects, "rules": rules, "layers": layers, "latency": latency, "error_rate": error_rate}
+
+    try:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators.values()))
+        result["cold_refresh_s"] = round(time.perf_counter() - start_time, 4)
+        result["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+        result["cold_requests"] = server.requests
+        result["cold_bytes"] = server.bytes_out
+
+        rules_coordinator = coordinators["rules"]
+        batcher = CheckPointRuleBatcher(hass, api)
+        batcher.async_add_coordinator(rules_coordinator)
+        switches = [
+            CheckPointRuleSwitch(rules_coordinator, batcher, package, rule, "127.0.0.1", "bench")
+            for rule in rules_coordinator.data.get("rules", [])
+        ]
+
+        # First evaluation, which builds and caches every switch's attributes
+        start_time = time.perf_counter()
+        for switch in switches:
+            switch.extra_state_attributes
+        result["attribute_build_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+
+        server.reset_counters()
+        server.tick_hits()
+        start_time = time.perf_counter()
+        await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators.values()))
+        result["warm_refresh_s"] = round(time.perf_counter() - start_time, 4)
+        result["warm_requests"] = server.requests
+        result["warm_bytes"] = server.bytes_out
+        result["warm_calls"] = dict(server.calls)
+
+        # What async_write_ha_state would evaluate for every rule switch
+        start_time = time.perf_counter()
+        for switch in switches:
+            switch.is_on
+            switch.extra_state_attributes
+        result["entity_eval_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+        result["entity_count"] = len(switches)
+        result["entity_writes"] = sum(1 for switch in switches if ("rule", switch.rule_uid) in rules_coordinator.changed)
+        result["rule_count"] = len(rules_coordinator.data.get("rules", []))
+
+        if push:
+            result.update(await measure_push(hass, server, rules_coordinator))
+    finally:
+        await api.close()
+        await runner.cleanup()
+        await hass.async_stop(force=True)
+
+    return result
+
+SCENARIO_KEYS = ("objects", "rules", "layers", "latency", "error_rate")
+
+def scenario_key(result):
+    # Runs with another latency or error rate are different scenarios, not regressions
+    return tuple(result.get(key) for key in SCENARIO_KEYS)
+
+def compare(results, baseline, threshold):
+    previous = {scenario_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = previous.get(scenario_key(result))
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            if after > before * (1 + threshold):
+                regressions.append(f"{result['objects']} objects / {result['rules']} rules: {metric} {before} -> {after}")
+    return regressions
+
+def print_table(results):
+    columns = ("objects", "rules", *COMPARED_METRICS, "entity_writes")
+    print(" ".join(f"{column:>15}" for column in columns))
+    for result in results:
+        print(" ".join(f"{result.get(column, ''):>15}" for column in columns))
+
+async def main(args):
+    results = []
+    for objects in args.objects:
+        rules = args.rules if args.rules is not None else max(10, objects // 5)
+        results.append(await run_scenario(objects, rules, args.layers, args.latency, args.error_rate, args.push))
+
+    print_table(results)
+    report = {"revision": _git_revision(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, nargs="+", default=[100, 1000, 10000], help="objects per show-* endpoint, one scenario each")
+    parser.add_argument("--rules", type=int, default=None, help="access rules in total (default: objects / 5)")
+    parser.add_argument("--layers", type=int, default=2, help="access layers in the package")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 500")
+    parser.add_argument("--push", action="store_true", help="also measure a push-mode refresh driven by synthetic syslog events")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
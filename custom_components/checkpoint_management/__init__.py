@@ -1,65 +1,113 @@
 import logging
-from datetime import timedelta
+from functools import partial
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import CONF_HOST, CONF_PORT, CONF_USERNAME, CONF_PASSWORD
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from .const import DOMAIN, CONF_POLICY_PACKAGE, CONF_VERIFY_SSL, CONF_POLLING_INTERVAL, API_ENDPOINTS
-from .api import CheckPointApiClient
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from .const import (
+    DOMAIN, CONF_POLICY_PACKAGE, CONF_POLLING_INTERVAL, CONF_HITS_INTERVAL, CONF_HITS_WINDOW, CONF_ADAPTIVE_POLLING,
+    DEFAULT_HITS_INTERVAL, DEFAULT_HITS_WINDOW, SNAPSHOT_VERSION, CONF_PUSH_MODE, CONF_SYSLOG_PORT, PUSH_POLLING_INTERVAL
+)
+from .coordinator import CheckPointRulesCoordinator
+from .shared import SHARED_TIERS, async_acquire_server, async_release_server, server_key, server_storage_key
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = ["sensor", "button", "switch"] 
+PLATFORMS = ["sensor", "button", "switch"]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    api = CheckPointApiClient(
-        entry.data[CONF_HOST],
-        entry.data[CONF_PORT],
-        entry.data[CONF_USERNAME],
-        entry.data[CONF_PASSWORD],
-        entry.data.get(CONF_VERIFY_SSL, False)
-    )
-
-    async def async_update_data():
-        await api.login()
-        data = {}
-        package = entry.data[CONF_POLICY_PACKAGE]
-        
-        for key, endpoint in API_ENDPOINTS.items():
-            data[key] = await api.get_object_count(endpoint, package)
-            
-        data["rules"] = await api.get_all_access_rules(package)
-        data["license"] = await api.verify_management_license()
-        data["cloud_services"] = await api.show_cloud_services()
-        data["gateways"] = await api.get_gateways_and_servers()
-        
-        await api.logout()
-        return data
+    # The client, login and the global object/status tiers are shared with every other entry on this server
+    server = await async_acquire_server(hass, entry)
+    api = server["api"]
 
+    package = entry.data[CONF_POLICY_PACKAGE]
+    push_mode = entry.data.get(CONF_PUSH_MODE, False)
     polling_interval = entry.data.get(CONF_POLLING_INTERVAL, 60)
+    if push_mode:
+        # Changes arrive as events; polling is only a safety net for anything the events missed
+        polling_interval = max(polling_interval, PUSH_POLLING_INTERVAL)
 
-    coordinator = DataUpdateCoordinator(
-        hass,
-        logger=_LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=polling_interval),
+    rules_coordinator = CheckPointRulesCoordinator(
+        hass, api, package, polling_interval,
+        hits_interval=entry.data.get(CONF_HITS_INTERVAL, DEFAULT_HITS_INTERVAL),
+        hits_window=entry.data.get(CONF_HITS_WINDOW, DEFAULT_HITS_WINDOW),
+        adaptive=entry.data.get(CONF_ADAPTIVE_POLLING, True),
+        storage_key=f"{DOMAIN}.{entry.entry_id}"
     )
+    coordinators = {"rules": rules_coordinator, **server["coordinators"]}
+
+    try:
+        await rules_coordinator.async_start(entry)
+    except Exception:
+        await async_release_server(hass, entry)
+        raise
+
+    if push_mode:
+        receiver = server["push"]
+        entry.async_on_unload(receiver.async_add_rules_coordinator(rules_coordinator))
+        if entry.data.get(CONF_WEBHOOK_ID):
+            webhook.async_register(
+                hass, DOMAIN, f"Check Point {package}", entry.data[CONF_WEBHOOK_ID], receiver.async_handle_webhook
+            )
+            entry.async_on_unload(lambda: webhook.async_unregister(hass, entry.data[CONF_WEBHOOK_ID]))
+            _LOGGER.info(f"Push events for {package} are accepted at {webhook.async_generate_url(hass, entry.data[CONF_WEBHOOK_ID])}")
+        if entry.data.get(CONF_SYSLOG_PORT):
+            try:
+                await receiver.async_start_syslog(entry.data[CONF_SYSLOG_PORT])
+            except OSError as e:
+                _LOGGER.error(f"Could not listen for log export on UDP port {entry.data[CONF_SYSLOG_PORT]}: {e}")
+
+    batcher = server["batcher"]
+    entry.async_on_unload(batcher.async_add_coordinator(rules_coordinator))
 
-    await coordinator.async_config_entry_first_refresh()
+    @callback
+    def async_install_updated(install_package, install):
+        if install_package == package and install["finished_at"] is not None:
+            hass.bus.async_fire(f"{DOMAIN}_policy_install", {"entry_id": entry.entry_id, "package": install_package, **install})
+
+    entry.async_on_unload(api.add_install_listener(async_install_updated))
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
-        "coordinator": coordinator,
+        "coordinators": coordinators,
+        "batcher": batcher,
         "api": api,
-        "package": entry.data[CONF_POLICY_PACKAGE]
+        "package": package,
+        "push": server["push"] if push_mode else None
     }
 
+    await er.async_migrate_entries(hass, entry.entry_id, partial(_async_migrate_unique_id, entry))
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
+@callback
+def _async_migrate_unique_id(entry, registry_entry):
+    """Rule switches were cp_rule_<uid>, which two packages sharing a layer would both claim."""
+    if registry_entry.domain == "switch" and registry_entry.unique_id.startswith("cp_rule_"):
+        uid = registry_entry.unique_id.removeprefix("cp_rule_")
+        return {"new_unique_id": f"cp_{entry.entry_id}_rule_{uid}"}
+    return None
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Other entries keep using the batcher; only apply what is still queued
+        await entry_data["batcher"].async_flush()
+        await entry_data["coordinators"]["rules"].async_shutdown()
+        await async_release_server(hass, entry)
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    await Store(hass, SNAPSHOT_VERSION, f"{DOMAIN}.{entry.entry_id}.rules").async_remove()
+
+    # The shared tiers' snapshots go with the last entry on the server
+    others = [
+        other for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != entry.entry_id and server_key(other.data) == server_key(entry.data)
+    ]
+    if not others:
+        for tier in SHARED_TIERS:
+            await Store(hass, SNAPSHOT_VERSION, f"{server_storage_key(entry.data)}.{tier}").async_remove()
@@ -1,166 +1,611 @@
 import aiohttp
+import asyncio
+import json
 import logging
+import random
+import time
+from functools import partial
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from .stats import ApiStats
+from .rules import RuleRecord, iter_rulebase, nest_inline_rules
+from .const import (
+    DEFAULT_CONNECTION_LIMIT, DEFAULT_MAX_CONCURRENCY, DEFAULT_PAGE_SIZE, DEFAULT_SESSION_TIMEOUT, DNS_CACHE_TTL, KEEPALIVE_TIMEOUT,
+    SESSION_EXPIRY_MARGIN, LAYER_CACHE_TTL, REQUEST_CACHE_SIZE, DEFAULT_HITS_WINDOW, MAX_RETRIES, RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY, LARGE_RESPONSE_BYTES, INSTALL_POLL_DELAY, INSTALL_POLL_MAX_DELAY, INSTALL_TIMEOUT, PUBLISH_TIMEOUT
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+SESSIONLESS_ENDPOINTS = ("login",)
+
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+# Management API error codes that mean "come back later" rather than "this request is wrong"
+BUSY_ERROR_CODES = ("err_too_many_requests", "generic_server_error", "err_server_busy")
+
+# Calls that change nothing on the server, so retrying one after a timeout cannot run it twice
+READ_ONLY_PREFIXES = ("show-", "verify-")
+READ_ONLY_ENDPOINTS = ("login", "keepalive")
+
+# Every show-* call reports `total`; this is the cheapest request that still gets it
+COUNT_ONLY_PAYLOAD = {"offset": 0, "limit": 1, "details-level": "uid"}
+
+# show-task states after which an install no longer changes
+FINISHED_TASK_STATES = ("succeeded", "failed", "partially succeeded")
+
+def _decode(body, status, transform=None):
+    """Parse a response body and, for a successful call, reduce it with `transform` in the same pass."""
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        if status < 400:
+            raise
+        return None
+    if transform is not None and status < 400 and data is not None:
+        data = transform(data)
+    return data
+
+def create_transport(verify_ssl=False, connection_limit=DEFAULT_CONNECTION_LIMIT):
+    """A pooled aiohttp session tuned for one management server; clients of several domains can share it."""
+    connector = aiohttp.TCPConnector(
+        ssl=verify_ssl,
+        limit=connection_limit,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+class RequestFailed(Exception):
+    """An API call failed after its retries; raised where a missing answer must not read as "none"."""
+
+class IncompleteResponse(RequestFailed):
+    """A paged read came back with pages missing, so its result cannot be trusted to be the whole set."""
+
 class CheckPointApiClient:
-    def __init__(self, host, port, username, password, verify_ssl=False):
+    def __init__(self, host, port, username, password, verify_ssl=False, session=None, connection_limit=DEFAULT_CONNECTION_LIMIT, max_concurrency=DEFAULT_MAX_CONCURRENCY, session_timeout=DEFAULT_SESSION_TIMEOUT, page_size=DEFAULT_PAGE_SIZE, domain=None):
         self.base_url = f"https://{host}:{port}/web_api"
         self.username = username
         self.password = password
+        # Multi-Domain Server: log in to this domain instead of the MDS itself
+        self.domain = domain or None
         self.verify_ssl = verify_ssl
+        self.connection_limit = connection_limit
+        self.max_concurrency = max_concurrency
+        self.page_size = page_size
         self.sid = None
+        self.session_timeout = session_timeout
+        self._last_used = 0.0
+        self._login_lock = asyncio.Lock()
+        self.stats = ApiStats()
+
+        # (endpoint, payload) -> (expires_at, response), least recently used first
+        self._cache = OrderedDict()
 
-    async def _request(self, endpoint, payload=None):
+        # Caps the number of in-flight calls, however many callers fan out at once
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # A session handed in by the caller (e.g. Home Assistant's shared one) is never closed by us
+        self._session = session
+        self._owns_session = session is None
+
+        # Policy installs: package -> tracking task, packages with a request not yet covered, package -> progress
+        self._install_tasks = {}
+        self._install_requested = set()
+        self._install_listeners = set()
+        self.installs = {}
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = create_transport(self.verify_ssl, self.connection_limit)
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        for task in self._install_tasks.values():
+            task.cancel()
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, endpoint, payload, sid, transform=None):
         headers = {"Content-Type": "application/json"}
-        if self.sid:
-            headers["X-chkp-sid"] = self.sid
+        if sid:
+            headers["X-chkp-sid"] = sid
+
+        session = self._get_session()
+        async with self._semaphore:
+            async with session.post(f"{self.base_url}/{endpoint}", json=payload or {}, headers=headers, ssl=self.verify_ssl) as response:
+                status = response.status
+                body = await response.read()
+
+        # Full rulebase and object pages run to megabytes; decoding those on the event loop stalls Home Assistant
+        if len(body) >= LARGE_RESPONSE_BYTES:
+            data = await asyncio.get_running_loop().run_in_executor(None, _decode, body, status, transform)
+        else:
+            data = _decode(body, status, transform)
+        return status, data, len(body)
+
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _cache_put(self, key, ttl, data):
+        self._cache[key] = (time.monotonic() + ttl, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > REQUEST_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def invalidate_cache(self):
+        self._cache.clear()
 
-        connector = aiohttp.TCPConnector(verify_ssl=self.verify_ssl)
-        async with aiohttp.ClientSession(connector=connector) as session:
+    async def _request(self, endpoint, payload=None, cache_ttl=None, transform=None):
+        # Transformed responses are never cached: the cache key cannot tell two transforms of one call apart
+        cache_key = None
+        if cache_ttl and transform is None:
+            cache_key = (endpoint, json.dumps(payload or {}, sort_keys=True))
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                return cached
+
+        data = await self._request_uncached(endpoint, payload, transform)
+        if cache_key is not None and data is not None:
+            self._cache_put(cache_key, cache_ttl, data)
+        return data
+
+    async def _require(self, endpoint, payload=None, cache_ttl=None, transform=None):
+        """Like _request(), but raise RequestFailed instead of returning None, so callers keep what they had."""
+        data = await self._request(endpoint, payload, cache_ttl, transform)
+        if data is None:
+            raise RequestFailed(f"No response from {endpoint}")
+        return data
+
+    def _is_read_only(self, endpoint):
+        return endpoint in READ_ONLY_ENDPOINTS or endpoint.startswith(READ_ONLY_PREFIXES)
+
+    def _is_transient(self, status, data):
+        if not isinstance(status, int):
+            return True
+        if status in TRANSIENT_STATUSES:
+            return True
+        return isinstance(data, dict) and data.get("code") in BUSY_ERROR_CODES
+
+    async def _request_uncached(self, endpoint, payload=None, transform=None):
+        if endpoint not in SESSIONLESS_ENDPOINTS and not await self.ensure_session():
+            return None
+
+        retries = 0
+        relogged = False
+        while True:
+            sid = None if endpoint in SESSIONLESS_ENDPOINTS else self.sid
+            start = time.monotonic()
+            unsent = False
             try:
-                async with session.post(f"{self.base_url}/{endpoint}", json=payload or {}, headers=headers) as response:
-                    response.raise_for_status()
-                    return await response.json()
+                status, data, size = await self._post(endpoint, payload, sid, transform)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, data, size = type(e).__name__, None, 0
+                # Connection refused or unresolvable: the server never saw the request
+                unsent = isinstance(e, aiohttp.ClientConnectorError)
             except Exception as e:
+                self.stats.record(endpoint, time.monotonic() - start, 0, type(e).__name__, retries, error=str(e))
                 _LOGGER.error(f"Error calling {endpoint}: {e}")
                 return None
+            duration = time.monotonic() - start
 
-    async def login(self):
-        payload = {"user": self.username, "password": self.password}
+            if isinstance(status, int) and status < 400:
+                self.stats.record(endpoint, duration, size, status, retries)
+                if sid:
+                    self._touch()
+                return data
+
+            message = (data or {}).get("message") if isinstance(data, dict) else None
+            error = f"{status}: {message}" if message else str(status)
+
+            if status == 401 and sid and not relogged:
+                # The server dropped our SID (timeout, restart, admin logout); log in once more and retry
+                self.stats.record(endpoint, duration, size, status, retries, error=error)
+                _LOGGER.debug(f"Session expired while calling {endpoint}, logging in again")
+                relogged = True
+                await self._invalidate(sid)
+                if not await self.ensure_session():
+                    return None
+                continue
+
+            transient = self._is_transient(status, data)
+            self.stats.record(endpoint, duration, size, status, retries, error=error, throttled=transient)
+            # A write that timed out or got a 5xx may already have run (a second install-policy queues a second
+            # install), so writes are only retried when the request provably never reached the server
+            retry = transient and (unsent or self._is_read_only(endpoint))
+            if not retry or retries >= MAX_RETRIES:
+                _LOGGER.error(f"Error calling {endpoint}: {error}")
+                return None
+
+            # Full jitter keeps concurrent callers from retrying in lockstep against a busy server
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** retries))
+            retries += 1
+            _LOGGER.debug(f"Transient error calling {endpoint} ({error}), retry {retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _touch(self):
+        self._last_used = time.monotonic()
+
+    def _session_valid(self):
+        if not self.sid:
+            return False
+        return time.monotonic() - self._last_used < self.session_timeout - SESSION_EXPIRY_MARGIN
+
+    async def _login(self):
+        payload = {"user": self.username, "password": self.password, "session-timeout": self.session_timeout}
+        if self.domain:
+            payload["domain"] = self.domain
         data = await self._request("login", payload)
         if data and "sid" in data:
             self.sid = data["sid"]
+            self.session_timeout = data.get("session-timeout", self.session_timeout)
+            self._touch()
             return True
+        self.sid = None
         return False
 
+    async def _invalidate(self, sid):
+        async with self._login_lock:
+            if self.sid == sid:
+                self.sid = None
+
+    async def ensure_session(self):
+        # Serialized so that concurrent callers share one login instead of racing
+        async with self._login_lock:
+            if self._session_valid():
+                return True
+            return await self._login()
+
+    async def login(self):
+        async with self._login_lock:
+            return await self._login()
+
+    async def keepalive(self):
+        if not self.sid or time.monotonic() - self._last_used < self.session_timeout / 3:
+            return
+        if await self._request("keepalive", {}) is None:
+            await self._invalidate(self.sid)
+
     async def logout(self):
-        if self.sid:
-            await self._request("logout")
-            self.sid = None
+        async with self._login_lock:
+            if self.sid:
+                try:
+                    await self._post("logout", {}, self.sid)
+                except Exception as e:
+                    _LOGGER.debug(f"Error calling logout: {e}")
+                self.sid = None
+
+    async def paginate(self, endpoint, payload=None, page_size=None, cache_ttl=None, transform=None, strict=False):
+        """Yield every page of a show-* call, the pages after the first fetched a window at a time."""
+        # `transform` reduces each page while it is decoded and must keep `total`;
+        # `strict` raises on a missing page, for callers that treat absence as deletion
+        page_size = page_size or self.page_size
+        payload = dict(payload or {})
+
+        first = await self._request(endpoint, {**payload, "offset": 0, "limit": page_size}, cache_ttl, transform)
+        if not first:
+            if strict:
+                raise IncompleteResponse(f"No response from {endpoint}")
+            return
+        yield first
+
+        offsets = list(range(page_size, first.get("total", 0), page_size))
+        for i in range(0, len(offsets), self.max_concurrency):
+            window = offsets[i:i + self.max_concurrency]
+            pages = await asyncio.gather(*(
+                self._request(endpoint, {**payload, "offset": offset, "limit": page_size}, cache_ttl, transform) for offset in window
+            ))
+            for offset, page in zip(window, pages):
+                if page is None:
+                    if strict:
+                        raise IncompleteResponse(f"Missing page at offset {offset} of {endpoint}")
+                    _LOGGER.warning(f"Missing page at offset {offset} of {endpoint}")
+                    continue
+                yield page
+
+    async def iter_objects(self, endpoint, key, payload=None, page_size=None, cache_ttl=None, strict=False):
+        """Stream the items found under `key` across all pages."""
+        async for page in self.paginate(endpoint, payload, page_size, cache_ttl, strict=strict):
+            for item in page.get(key, []):
+                yield item
 
     async def get_packages(self):
-        data = await self._request("show-packages", {"limit": 100})
-        if data and "packages" in data:
-            return [pkg["name"] for pkg in data["packages"]]
-        return []
+        return [pkg["name"] async for pkg in self.iter_objects("show-packages", "packages") if "name" in pkg]
+
+    async def _get_layer_names(self):
+        # Shared by the layer sensor, the rule count and the rule fetch, so it is only pulled once per TTL
+        return [
+            layer["name"]
+            async for layer in self.iter_objects(
+                "show-access-layers", "access-layers", {"details-level": "standard"}, cache_ttl=LAYER_CACHE_TTL, strict=True
+            )
+            if "name" in layer
+        ]
 
     async def _get_all_layers(self):
-        data = await self._request("show-access-layers", {"limit": 500, "details-level": "standard"})
-        layers = []
-        if data and "access-layers" in data:
-            for layer in data["access-layers"]:
-                layers.append(layer["name"])
-                
+        layers = await self._get_layer_names()
+
         if not layers:
             layers.append("Network")
-            
+
         return layers
 
-    # CHANGED: Now returns a dictionary with both 'total' and 'names'
     async def get_object_count(self, endpoint, package=None):
-        if endpoint == "show-access-rulebase":
-            layers = await self._get_all_layers()
-            total_rules = 0
-            for layer in layers:
-                payload = {"offset": 0, "limit": 1, "name": layer, "details-level": "standard"}
-                data = await self._request(endpoint, payload)
-                if data and "total" in data:
-                    total_rules += data["total"]
-            return {"total": total_rules, "names": []}
-            
-        elif endpoint == "show-nat-rulebase":
-            payload = {"offset": 0, "limit": 500, "package": package, "details-level": "standard"}
-            data = await self._request(endpoint, payload)
-            if not data:
-                return {"total": 0, "names": []}
-            
-            rules = self._extract_rules(data.get("rulebase", []))
-            names = [r.get("name") or f"Rule {r.get('rule-number')}" for r in rules]
-            return {"total": data.get("total", 0), "names": names}
-            
+        """Return {"total", "names"} from the smallest page the server will give us; raises RequestFailed on failure."""
+        # `names` stays empty here; the coordinator fills it in only for sensors that ask for names
+        if endpoint == "show-access-layers":
+            return {"total": len(await self._get_layer_names()), "names": []}
+
+        payload = dict(COUNT_ONLY_PAYLOAD)
+        if endpoint == "show-nat-rulebase":
+            payload["package"] = package
+
+        data = await self._require(endpoint, payload)
+        return {"total": data.get("total", 0), "names": []}
+
+    def _read_names(self, page):
+        return {"total": page.get("total", 0), "names": [obj["name"] for obj in page.get("objects", []) if "name" in obj]}
+
+    def _read_rule_names(self, page):
+        return {
+            "total": page.get("total", 0),
+            "names": [rule.get("name") or f"Rule {rule.get('rule-number')}" for rule, _ in iter_rulebase(page.get("rulebase", []))]
+        }
+
+    async def get_object_names(self, endpoint, package=None):
+        if endpoint == "show-access-layers":
+            return await self._get_layer_names()
+
+        if endpoint == "show-nat-rulebase":
+            payload, transform = {"package": package, "details-level": "standard"}, self._read_rule_names
         else:
-            payload = {"limit": 500, "details-level": "standard"} 
-            data = await self._request(endpoint, payload)
-            if not data:
-                return {"total": 0, "names": []}
-                
-            total = data.get("total", 0)
-            names = []
-            
-            if "objects" in data:
-                names = [obj.get("name") for obj in data["objects"] if "name" in obj]
-            elif "access-layers" in data:
-                names = [obj.get("name") for obj in data["access-layers"] if "name" in obj]
-                
-            return {"total": total, "names": names}
-
-    async def get_all_access_rules(self, package):
-        layers = await self._get_all_layers() 
-        
+            payload, transform = {"details-level": "standard"}, self._read_names
+        return [name async for page in self.paginate(endpoint, payload, transform=transform, strict=True) for name in page["names"]]
+
+    async def get_package_layers(self, package):
+        """Return the access layers of `package`, or every layer if the package lists none."""
+        # A failed show-package raises: reading every layer would pull in other packages' rules
+        if package:
+            data = await self._require("show-package", {"name": package, "details-level": "standard"}, cache_ttl=LAYER_CACHE_TTL)
+            layers = [layer["name"] for layer in data.get("access-layers", []) if "name" in layer]
+            if layers:
+                return layers
+            _LOGGER.warning(f"Package {package} lists no access layers, falling back to all layers")
+
+        return await self._get_all_layers()
+
+    def _hits_settings(self, hits_window):
         now = datetime.now()
-        one_hour_ago = now - timedelta(hours=168)
-        all_rules = []
-        
-        for layer in layers:
-            payload = {
-                "name": layer, 
-                "details-level": "standard", 
-                "limit": 500, 
-                "offset": 0,
-                "show-hits": True,
-                "hits-settings": {
-                    "from-date": one_hour_ago.strftime("%Y-%m-%dT%H:%M:%S"),
-                    "to-date": now.strftime("%Y-%m-%dT%H:%M:%S")
-                }
+        return {
+            "from-date": (now - timedelta(hours=hits_window)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "to-date": now.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+    async def _get_layer_rules(self, layer, hits_settings, parent=None):
+        payload = {
+            "name": layer,
+            "details-level": "standard",
+            "show-hits": True,
+            "hits-settings": hits_settings
+        }
+
+        # Pages are reduced to RuleRecords while they are decoded, so no raw rulebase document is kept.
+        # Strict: a rule missing from a partial read would otherwise have its switch removed
+        transform = partial(self._read_rule_page, layer, parent, {})
+        pages = self.paginate("show-access-rulebase", payload, transform=transform, strict=True)
+        return [rule async for page in pages for rule in page["rules"]]
+
+    def _read_rule_page(self, layer, parent, shared, page):
+        objects = {obj["uid"]: obj.get("name", obj["uid"]) for obj in page.get("objects-dictionary", []) if "uid" in obj}
+        return {
+            "total": page.get("total", 0),
+            "rules": [
+                RuleRecord.from_api(rule, layer, objects, shared, section, parent)
+                for rule, section in iter_rulebase(page.get("rulebase", []))
+            ]
+        }
+
+    async def get_all_access_rules(self, package, hits_window=DEFAULT_HITS_WINDOW):
+        layers = await self.get_package_layers(package)
+        hits_settings = self._hits_settings(hits_window)
+
+        # Layers are pulled in parallel; the client semaphore keeps the fan-out bounded
+        per_layer = await asyncio.gather(*(self._get_layer_rules(layer, hits_settings) for layer in layers))
+        rules = [rule for rules in per_layer for rule in rules]
+
+        # Inline layers are not listed on the package, so follow "Apply Layer" rules down to them, each layer once
+        seen = set(layers)
+        children = {}
+        pending = {rule.inline_layer: rule.uid for rule in rules if rule.inline_layer and rule.inline_layer not in seen}
+        while pending:
+            seen.update(pending)
+            nested = await asyncio.gather(*(self._get_layer_rules(layer, hits_settings, parent) for layer, parent in pending.items()))
+            for parent, layer_rules in zip(pending.values(), nested):
+                children[parent] = layer_rules
+            pending = {
+                rule.inline_layer: rule.uid
+                for layer_rules in nested for rule in layer_rules
+                if rule.inline_layer and rule.inline_layer not in seen
             }
-            
-            data = await self._request("show-access-rulebase", payload)
-            if data and "rulebase" in data:
-                rules = self._extract_rules(data["rulebase"])
-                for rule in rules:
-                    rule["layer_name"] = layer
-                all_rules.extend(rules)
-                
-        return all_rules
-
-    def _extract_rules(self, rulebase):
-        rules = []
-        for item in rulebase:
-            if "rulebase" in item:
-                rules.extend(self._extract_rules(item["rulebase"]))
-            elif "rule-number" in item:
-                rules.append(item)
-        return rules
+        return nest_inline_rules(rules, children) if children else rules
+
+    async def _get_layer_hits(self, layer, hits_settings):
+        payload = {
+            "name": layer,
+            "details-level": "uid",
+            "show-hits": True,
+            "hits-settings": hits_settings
+        }
+        hits = {}
+        async for page in self.paginate("show-access-rulebase", payload, transform=self._read_hits):
+            hits.update(page["hits"])
+        return hits
+
+    def _read_hits(self, page):
+        return {
+            "total": page.get("total", 0),
+            "hits": {rule["uid"]: rule["hits"] for rule, _ in iter_rulebase(page.get("rulebase", [])) if "uid" in rule and "hits" in rule}
+        }
+
+    async def get_rule_hits(self, package, hits_window=DEFAULT_HITS_WINDOW, layers=None):
+        """Return {rule uid: hits} at the smallest details-level, without re-reading rule bodies."""
+        # Pass the layers of the last full fetch to include inline layers
+        layers = layers or await self.get_package_layers(package)
+        hits_settings = self._hits_settings(hits_window)
+
+        per_layer = await asyncio.gather(*(self._get_layer_hits(layer, hits_settings) for layer in layers))
+        hits = {}
+        for layer_hits in per_layer:
+            hits.update(layer_hits)
+        return hits
+
+    async def get_access_rule(self, uid, layer, hits_window=DEFAULT_HITS_WINDOW):
+        """Re-read a single rule with its hit count, for targeted refreshes."""
+        payload = {
+            "uid": uid,
+            "layer": layer,
+            "details-level": "standard",
+            "show-hits": True,
+            "hits-settings": self._hits_settings(hits_window)
+        }
+        return await self._request("show-access-rule", payload)
 
     async def set_access_rule_state(self, uid, layer, enabled: bool):
         payload = {"uid": uid, "layer": layer, "enabled": enabled}
         return await self._request("set-access-rule", payload)
 
     async def publish(self):
-        return await self._request("publish", {})
+        """Publish the session and wait for the publish task; True once the changes are committed."""
+        data = await self._request("publish", {})
+        if data is None:
+            return False
+        task = None
+        if data.get("task-id"):
+            task = await self.wait_for_task(data["task-id"], PUBLISH_TIMEOUT)
+            if task is None or task.get("status") != "succeeded":
+                _LOGGER.error(f"Publish task {data['task-id']} did not succeed: {(task or {}).get('status', 'timed out')}")
+                return False
+        self.invalidate_cache()
+        return True
+
+    async def discard(self):
+        """Drop every unpublished change of our session, releasing the locks it holds."""
+        return await self._request("discard", {})
+
+    def add_install_listener(self, update_callback):
+        """Call `update_callback(package, install)` whenever an install's progress changes."""
+        self._install_listeners.add(update_callback)
+        return lambda: self._install_listeners.discard(update_callback)
+
+    def _update_install(self, package, **changes):
+        install = self.installs[package]
+        install.update(changes)
+        for update_callback in list(self._install_listeners):
+            update_callback(package, install)
+
+    def install_policy(self, package):
+        """Install `package` in the background and return the asyncio.Task tracking it."""
+        # Requests made while an install of the package runs are merged into one follow-up install
+        self._install_requested.add(package)
+        task = self._install_tasks.get(package)
+        if task is None or task.done():
+            task = self._install_tasks[package] = asyncio.get_running_loop().create_task(self._run_installs(package))
+        return task
+
+    async def _run_installs(self, package):
+        while package in self._install_requested:
+            self._install_requested.discard(package)
+            await self._install_once(package)
+        return self.installs[package]
+
+    async def _install_once(self, package):
+        started = time.time()
+        self.installs[package] = {
+            "state": "requested", "progress": 0, "task_id": None, "message": None,
+            "started_at": started, "finished_at": None, "duration": None
+        }
+        self._update_install(package)
 
-    async def install_policy(self, package):
         payload = {"policy-package": package, "access": True, "threat-prevention": False}
         data = await self._request("install-policy", payload)
-        return data is not None
+        task_id = (data or {}).get("task-id")
+        if not task_id:
+            self._finish_install(package, "failed", "install-policy was not accepted")
+            return
+        self._update_install(package, state="in progress", task_id=task_id)
+
+        task = await self.wait_for_task(task_id, INSTALL_TIMEOUT, partial(self._install_progress, package))
+        if task is None:
+            self._finish_install(package, "timed out", f"No result after {INSTALL_TIMEOUT}s")
+            return
+        self._finish_install(package, task["status"], task.get("comments"), task.get("progress-percentage", 100))
+
+    def _install_progress(self, package, task):
+        progress = task.get("progress-percentage", self.installs[package]["progress"])
+        if progress != self.installs[package]["progress"]:
+            self._update_install(package, progress=progress)
+
+    async def wait_for_task(self, task_id, timeout, on_progress=None):
+        """Poll show-task until `task_id` finishes; returns the finished task, or None after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        delay = INSTALL_POLL_DELAY
+        while time.monotonic() < deadline:
+            # Tasks take from seconds to many minutes, so show-task is polled less and less often
+            await asyncio.sleep(delay)
+            delay = min(INSTALL_POLL_MAX_DELAY, delay * 2)
+
+            data = await self._request("show-task", {"task-id": task_id, "details-level": "standard"})
+            tasks = (data or {}).get("tasks") or []
+            if not tasks:
+                continue
+            task = tasks[0]
+            if task.get("status", "in progress") in FINISHED_TASK_STATES:
+                return task
+            if on_progress is not None:
+                on_progress(task)
+        return None
+
+    def _finish_install(self, package, state, message=None, progress=None):
+        finished = time.time()
+        install = self.installs[package]
+        if state == "failed":
+            _LOGGER.error(f"Policy install of {package} failed: {message}")
+        self._update_install(
+            package, state=state, message=message, progress=install["progress"] if progress is None else progress,
+            finished_at=finished, duration=round(finished - install["started_at"], 1)
+        )
 
     async def get_gateways_and_servers(self):
-        data = await self._request("show-gateways-and-servers", {"details-level": "standard", "limit": 500})
         gateways_data = {"types": {}, "mgmt_servers": []}
-        
-        if data and "objects" in data:
-            for obj in data["objects"]:
-                obj_type = obj.get("type", "Unknown")
-                gateways_data["types"][obj_type] = gateways_data["types"].get(obj_type, 0) + 1
-                if obj_type == "CpmiHostCkp":
-                    gateways_data["mgmt_servers"].append(obj.get("name"))
-                    
+
+        # Strict for the same reason: the gateway type sensors follow these counts
+        async for obj in self.iter_objects("show-gateways-and-servers", "objects", {"details-level": "standard"}, strict=True):
+            obj_type = obj.get("type", "Unknown")
+            gateways_data["types"][obj_type] = gateways_data["types"].get(obj_type, 0) + 1
+            if obj_type == "CpmiHostCkp":
+                gateways_data["mgmt_servers"].append(obj.get("name"))
+
         return gateways_data
 
+    async def get_revision(self):
+        """Return the uid of the last published session, a cheap marker for "policy or objects changed"."""
+        data = await self._request("show-last-published-session", {})
+        if data and "uid" in data:
+            return data["uid"]
+        return None
+
     async def verify_management_license(self):
-        return await self._request("verify-management-license", {})
+        return await self._require("verify-management-license", {})
 
     async def show_cloud_services(self):
-        return await self._request("show-cloud-services", {})
+        return await self._require("show-cloud-services", {})
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from .const import DEFAULT_BATCH_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+class CheckPointRuleBatcher:
+    """Collects rule state changes and applies them with one publish and one install per package.
+
+    There is one batcher per server: its entries share one session, and publish
+    and discard act on the whole session. Switch flips are queued for `window`
+    seconds; every change collected in that window is then set, published once,
+    and each package it touched is installed. Switches read desired_state() to
+    report the queued or in-flight state optimistically instead of waiting for
+    the next rules refresh.
+    """
+
+    def __init__(self, hass, api, window=DEFAULT_BATCH_WINDOW):
+        self.hass = hass
+        self.api = api
+        self.window = window
+        # uid -> (layer, enabled, rules coordinator of the entry that made the change)
+        self.pending = {}
+        self.in_flight = {}
+        # uid -> the rules revision before our publish; the change is settled once the rules moved past it
+        self._published = {}
+        self._listeners = {}
+        self._coordinators = {}
+        self._flush_lock = asyncio.Lock()
+        self._unsub_timer = None
+
+    @callback
+    def async_add_coordinator(self, coordinator):
+        """Settle changes as `coordinator` refreshes; the returned callback drops it and its changes again."""
+        self._coordinators[coordinator] = coordinator.async_add_listener(self._async_settle)
+
+        @callback
+        def _remove():
+            unsub = self._coordinators.pop(coordinator, None)
+            if unsub is not None:
+                unsub()
+            for changes in (self.pending, self.in_flight):
+                for uid in [uid for uid, change in changes.items() if change[2] is coordinator]:
+                    del changes[uid]
+                    self._published.pop(uid, None)
+
+        return _remove
+
+    @callback
+    def async_add_listener(self, uid, update_callback):
+        self._listeners.setdefault(uid, set()).add(update_callback)
+
+        @callback
+        def _remove():
+            self._listeners.get(uid, set()).discard(update_callback)
+
+        return _remove
+
+    @callback
+    def _notify(self, uids):
+        for uid in uids:
+            for update_callback in list(self._listeners.get(uid, ())):
+                update_callback()
+
+    def desired_state(self, uid):
+        if uid in self.pending:
+            return self.pending[uid][1]
+        if uid in self.in_flight:
+            return self.in_flight[uid][1]
+        return None
+
+    def change_state(self, uid):
+        if uid in self.pending:
+            return "pending"
+        if uid in self.in_flight:
+            return "in_flight"
+        return None
+
+    @callback
+    def async_queue(self, uid, layer, enabled, coordinator):
+        self.pending[uid] = (layer, enabled, coordinator)
+        self._notify((uid,))
+        if self._unsub_timer is None:
+            self._unsub_timer = async_call_later(self.hass, self.window, self._async_window_closed)
+
+    async def _async_window_closed(self, now):
+        self._unsub_timer = None
+        await self.async_flush()
+
+    async def async_flush(self):
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            batch, self.pending = self.pending, {}
+            self.in_flight.update(batch)
+            for uid in batch:
+                self._published.pop(uid, None)
+            self._notify(batch)
+            coordinators = {coordinator for _, _, coordinator in batch.values()}
+            packages = ", ".join(sorted(coordinator.package for coordinator in coordinators))
+            _LOGGER.debug(f"Applying {len(batch)} rule changes to {packages}")
+
+            revisions = {coordinator: (coordinator.data or {}).get("revision") for coordinator in coordinators}
+            try:
+                results = await asyncio.gather(*(
+                    self.api.set_access_rule_state(uid, layer, enabled) for uid, (layer, enabled, _) in batch.items()
+                ))
+                failed = [uid for uid, result in zip(batch, results) if result is None]
+                if failed:
+                    _LOGGER.error(f"Could not change {len(failed)} rules in {packages}: {', '.join(failed)}")
+                applied = [uid for uid in batch if uid not in failed]
+                if applied:
+                    # Waits for the publish task, so the installs and the refreshes below see the committed policy
+                    if await self.api.publish():
+                        self._published.update((uid, revisions[batch[uid][2]]) for uid in applied)
+                        # Tracked in the background by the API client
+                        for package in sorted({batch[uid][2].package for uid in applied}):
+                            self.api.install_policy(package)
+                    else:
+                        # Left in the shared session, the changes would keep those rules locked for other administrators
+                        _LOGGER.error(f"Publishing {len(applied)} rule changes to {packages} failed, discarding them")
+                        await self.api.discard()
+                for coordinator in coordinators:
+                    coordinator.async_boost()
+                await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+            finally:
+                # What was not published is dropped now; published changes stay in flight until the rules show them
+                unpublished = [uid for uid in batch if uid not in self._published]
+                for uid in unpublished:
+                    self.in_flight.pop(uid, None)
+                self._notify(unpublished)
+                self._async_settle()
+
+    @callback
+    def _async_settle(self):
+        settled = []
+        for uid, revision in self._published.items():
+            _, enabled, coordinator = self.in_flight[uid]
+            data = coordinator.data or {}
+            rule = data.get("rule_index", {}).get(uid)
+            if rule is None or rule.enabled == enabled or data.get("revision") != revision:
+                settled.append(uid)
+        for uid in settled:
+            del self._published[uid]
+            del self.in_flight[uid]
+        self._notify(settled)
+
+    async def async_shutdown(self):
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        await self.async_flush()
+        for unsub in self._coordinators.values():
+            unsub()
+        self._coordinators.clear()
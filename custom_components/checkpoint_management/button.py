@@ -35,6 +35,5 @@ class CheckPointInstallPolicyButton(ButtonEntity):
         )
 
     async def async_press(self) -> None:
-        await self.api.login()
-        await self.api.install_policy(self.package)
-        await self.api.logout()
+        # Returns at once; presses during a running install are merged into one follow-up install
+        self.api.install_policy(self.package)
@@ -1,8 +1,17 @@
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.const import CONF_HOST, CONF_PORT, CONF_USERNAME, CONF_PASSWORD
-from .const import DOMAIN, CONF_POLICY_PACKAGE, CONF_VERIFY_SSL, CONF_POLLING_INTERVAL
+from homeassistant.components import webhook
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_USERNAME, CONF_PASSWORD, CONF_WEBHOOK_ID
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .const import (
+    DOMAIN, CONF_POLICY_PACKAGE, CONF_VERIFY_SSL, CONF_POLLING_INTERVAL, CONF_CONNECTION_LIMIT, DEFAULT_CONNECTION_LIMIT,
+    CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY, CONF_INCREMENTAL_SYNC,
+    CONF_OBJECTS_INTERVAL, DEFAULT_OBJECTS_INTERVAL, CONF_STATUS_INTERVAL, DEFAULT_STATUS_INTERVAL,
+    CONF_HITS_INTERVAL, DEFAULT_HITS_INTERVAL, CONF_HITS_WINDOW, DEFAULT_HITS_WINDOW, CONF_ADAPTIVE_POLLING, CONF_DOMAIN,
+    CONF_PUSH_MODE, CONF_SYSLOG_PORT
+)
 from .api import CheckPointApiClient
+from .shared import SHARED_SETTINGS, server_key
 
 class CheckPointConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
@@ -20,7 +29,9 @@ class CheckPointConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 user_input[CONF_PORT],
                 user_input[CONF_USERNAME],
                 user_input[CONF_PASSWORD],
-                user_input.get(CONF_VERIFY_SSL, False)
+                user_input.get(CONF_VERIFY_SSL, False),
+                session=async_get_clientsession(self.hass, verify_ssl=user_input.get(CONF_VERIFY_SSL, False)),
+                domain=user_input.get(CONF_DOMAIN)
             )
             if await self.api.login():
                 self.data = user_input
@@ -35,17 +46,47 @@ class CheckPointConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required(CONF_USERNAME): str,
             vol.Required(CONF_PASSWORD): str,
             vol.Optional(CONF_VERIFY_SSL, default=False): bool,
+            vol.Optional(CONF_DOMAIN, default=""): str,
         })
         return self.async_show_form(step_id="user", data_schema=data_schema, errors=errors)
 
+    def _server_entry(self):
+        key = server_key(self.data)
+        return next((entry for entry in self._async_current_entries() if server_key(entry.data) == key), None)
+
     async def async_step_package(self, user_input=None):
+        server_entry = self._server_entry()
         if user_input is not None:
             self.data.update(user_input)
+            if server_entry is not None:
+                self.data.update((key, server_entry.data[key]) for key in SHARED_SETTINGS if key in server_entry.data)
+            if self.data.get(CONF_PUSH_MODE):
+                self.data[CONF_WEBHOOK_ID] = webhook.async_generate_id()
             await self.api.logout()
-            return self.async_create_entry(title=self.data[CONF_HOST], data=self.data)
+            title = self.data[CONF_HOST]
+            if self.data.get(CONF_DOMAIN):
+                title = f"{title} / {self.data[CONF_DOMAIN]}"
+            return self.async_create_entry(title=f"{title} ({self.data[CONF_POLICY_PACKAGE]})", data=self.data)
 
-        data_schema = vol.Schema({
+        fields = {
             vol.Required(CONF_POLICY_PACKAGE): vol.In(self.packages),
-            vol.Required(CONF_POLLING_INTERVAL, default=60): vol.All(vol.Coerce(int), vol.Range(min=5))
+            vol.Required(CONF_POLLING_INTERVAL, default=60): vol.All(vol.Coerce(int), vol.Range(min=5)),
+            vol.Required(CONF_HITS_INTERVAL, default=DEFAULT_HITS_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=5)),
+            vol.Required(CONF_HITS_WINDOW, default=DEFAULT_HITS_WINDOW): vol.All(vol.Coerce(int), vol.Range(min=1, max=8760)),
+        }
+        # The shared tiers and the connection are already set up by the server's first entry
+        if server_entry is None:
+            fields.update({
+                vol.Required(CONF_OBJECTS_INTERVAL, default=DEFAULT_OBJECTS_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=30)),
+                vol.Required(CONF_STATUS_INTERVAL, default=DEFAULT_STATUS_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=60)),
+                vol.Required(CONF_CONNECTION_LIMIT, default=DEFAULT_CONNECTION_LIMIT): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Required(CONF_MAX_CONCURRENCY, default=DEFAULT_MAX_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Optional(CONF_INCREMENTAL_SYNC, default=True): bool,
+            })
+        fields.update({
+            vol.Optional(CONF_ADAPTIVE_POLLING, default=True): bool,
+            vol.Optional(CONF_PUSH_MODE, default=False): bool,
+            vol.Optional(CONF_SYSLOG_PORT, default=0): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535))
         })
+        data_schema = vol.Schema(fields)
         return self.async_show_form(step_id="package", data_schema=data_schema)
@@ -2,6 +2,55 @@ DOMAIN = "checkpoint_management"
 CONF_POLICY_PACKAGE = "policy_package"
 CONF_VERIFY_SSL = "verify_ssl"
 CONF_POLLING_INTERVAL = "polling_interval"
+CONF_CONNECTION_LIMIT = "connection_limit"
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_INCREMENTAL_SYNC = "incremental_sync"
+CONF_OBJECTS_INTERVAL = "objects_interval"
+CONF_STATUS_INTERVAL = "status_interval"
+CONF_HITS_INTERVAL = "hits_interval"
+CONF_HITS_WINDOW = "hits_window"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_DOMAIN = "domain"
+CONF_PUSH_MODE = "push_mode"
+CONF_SYSLOG_PORT = "syslog_port"
+
+DEFAULT_OBJECTS_INTERVAL = 600
+DEFAULT_STATUS_INTERVAL = 3600
+DEFAULT_HITS_INTERVAL = 300
+DEFAULT_HITS_WINDOW = 168
+DEFAULT_CONNECTION_LIMIT = 10
+DEFAULT_MAX_CONCURRENCY = 5
+DEFAULT_PAGE_SIZE = 500
+FULL_SYNC_INTERVAL = 3600
+NAMES_INTERVAL = 3600
+DEFAULT_BATCH_WINDOW = 5
+DEFAULT_SESSION_TIMEOUT = 600
+SESSION_EXPIRY_MARGIN = 30
+DNS_CACHE_TTL = 300
+LAYER_CACHE_TTL = 300
+REQUEST_CACHE_SIZE = 128
+STATS_WINDOW = 100
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10
+ADAPTIVE_MAX_FACTOR = 8
+ADAPTIVE_SLOW_RATIO = 0.5
+ADAPTIVE_DECAY = 0.75
+SNAPSHOT_VERSION = 4
+SNAPSHOT_SAVE_DELAY = 300
+KEEPALIVE_TIMEOUT = 30
+LARGE_RESPONSE_BYTES = 262144
+INSTALL_POLL_DELAY = 2
+INSTALL_POLL_MAX_DELAY = 30
+INSTALL_TIMEOUT = 1800
+
+# Publishing is a task too; the batcher waits for it before installing
+PUBLISH_TIMEOUT = 300
+PUSH_POLLING_INTERVAL = 900
+PUSH_DEBOUNCE = 2
+PUSH_MAX_TARGETED = 25
+ATTRIBUTE_MAX_MEMBERS = 50
+ENTITY_CHUNK_SIZE = 250
 
 API_ENDPOINTS = {
     "hosts": "show-hosts",
@@ -18,3 +67,9 @@ API_ENDPOINTS = {
     "vpn_star": "show-vpn-communities-star",
     "vpn_remote_access": "show-vpn-communities-remote-access"
 }
+
+# Package-specific counts, kept by each package's rules tier; every other count is global to the server
+RULE_COUNT_KEYS = ("access_rules", "nat_rules")
+
+# Sensors that show the object names as an attribute; every other sensor only needs the count
+NAMED_KEYS = ("access_layers", "networks", "hosts", "nat_rules")
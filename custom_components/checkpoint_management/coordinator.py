@@ -0,0 +1,467 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from .const import (
+    DOMAIN, API_ENDPOINTS, FULL_SYNC_INTERVAL, NAMES_INTERVAL, RULE_COUNT_KEYS, DEFAULT_HITS_INTERVAL, DEFAULT_HITS_WINDOW,
+    ADAPTIVE_MAX_FACTOR, ADAPTIVE_SLOW_RATIO, ADAPTIVE_DECAY, SNAPSHOT_VERSION, SNAPSHOT_SAVE_DELAY, PUSH_DEBOUNCE,
+    PUSH_MAX_TARGETED
+)
+from .rules import RuleRecord, RuleAttributeCache, index_rules
+
+_LOGGER = logging.getLogger(__name__)
+
+def _fingerprint(value):
+    return hash(json.dumps(value, sort_keys=True, default=str))
+
+class CheckPointDataUpdateCoordinator(DataUpdateCoordinator):
+    """Base for the per-tier coordinators; tracks what changed so entities only write when their data did."""
+
+    tier = None
+    sections = ()
+
+    # Rebuilt from the rest of the data, so never written to the snapshot
+    derived_keys = ("timings",)
+
+    def __init__(self, hass, api, package, interval, adaptive=True, storage_key=None):
+        super().__init__(
+            hass,
+            logger=_LOGGER,
+            name=f"{DOMAIN}_{self.tier}",
+            update_interval=timedelta(seconds=interval),
+        )
+        self.api = api
+        self.package = package
+        self.revisions = {}
+        self.changed = set()
+        self.suppressed_writes = 0
+        self._change_listeners = {}
+        self._change_listener_count = 0
+        self._unsub_change_listeners = None
+        self.last_cycle = {}
+        self.adaptive = adaptive
+        self.floor_interval = interval
+        self.name_keys = set()
+        self.failed_keys = set()
+
+        # Set once the data was fetched, or confirmed current by the server, in this run rather than only
+        # restored from a snapshot; until then nothing may be removed for being absent from it
+        self.live = False
+        self._store = Store(hass, SNAPSHOT_VERSION, f"{storage_key}.{self.tier}") if storage_key else None
+
+    async def async_load_snapshot(self):
+        """Populate data from the last saved snapshot; returns False if there is none."""
+        if self._store is None:
+            return False
+        try:
+            snapshot = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning(f"Ignoring unreadable {self.tier} snapshot: {e}")
+            return False
+        if not snapshot:
+            return False
+
+        data = self._restore(snapshot)
+        self._track_changes(data)
+        self.async_set_updated_data(data)
+        return True
+
+    async def async_start(self, entry=None):
+        """Bring the tier up from its snapshot if there is one, or else with a first refresh that must succeed."""
+        # The shared tiers pass no entry, since they outlive the one that happened to start them
+        # A snapshot lets entities come up immediately; the live refresh then runs in the background
+        if await self.async_load_snapshot():
+            name = f"{DOMAIN} {self.tier} refresh"
+            if entry is not None:
+                entry.async_create_background_task(self.hass, self.async_refresh(), name)
+            else:
+                self.hass.async_create_background_task(self.async_refresh(), name)
+            return
+        # Not async_config_entry_first_refresh(), which requires the coordinator to belong to an entry
+        await self.async_refresh()
+        if not self.last_update_success:
+            raise ConfigEntryNotReady(f"Initial {self.tier} refresh failed: {self.last_exception}")
+
+    @callback
+    def async_request_names(self, key):
+        """Start fetching the name list for `key`; only sensors that show names ask for it."""
+        if key in self.name_keys:
+            return
+        self.name_keys.add(key)
+        self.hass.async_create_task(self.async_request_refresh())
+
+    async def _async_fetch_names(self, data, previous, timings):
+        previous_names = previous.get("names") or {}
+        names_due = time.time() - previous.get("names_synced_at", 0) >= NAMES_INTERVAL
+        keys = [key for key in self.name_keys if names_due or key not in previous_names]
+
+        names = {key: previous_names[key] for key in self.name_keys if key in previous_names}
+        if keys:
+            fetched, name_timings, _ = await self._fan_out({
+                key: (lambda endpoint=API_ENDPOINTS[key]: self.api.get_object_names(endpoint, self.package))
+                for key in keys
+            }, previous_names, required=False)
+            names.update({key: value for key, value in fetched.items() if value is not None})
+            timings.update({f"{key}_names": value for key, value in name_timings.items()})
+
+        data["names_synced_at"] = time.time() if names_due and keys else previous.get("names_synced_at", 0)
+
+        data["names"] = names
+        for key, value in names.items():
+            if isinstance(data.get(key), dict):
+                data[key] = {**data[key], "names": value}
+
+    def _restore(self, snapshot):
+        return {**snapshot, "timings": {}}
+
+    def _snapshot(self):
+        return {key: value for key, value in (self.data or {}).items() if key not in self.derived_keys}
+
+    async def _async_fetch(self, previous):
+        raise NotImplementedError
+
+    async def _fan_out(self, calls, previous, required=True):
+        """Run every call concurrently, keeping the previous value of any call that fails; returns (data, timings, failed)."""
+        timings = {}
+
+        async def _timed(key, call):
+            start = time.monotonic()
+            try:
+                return await call()
+            finally:
+                timings[key] = round(time.monotonic() - start, 3)
+
+        keys = list(calls)
+        results = await asyncio.gather(*(_timed(key, calls[key]) for key in keys), return_exceptions=True)
+
+        data = {}
+        failed = set()
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                # Nothing to keep means the tier has no data at all for this key, which is not a successful refresh
+                if required and previous.get(key) is None:
+                    raise UpdateFailed(f"Error refreshing {key}: {result}")
+                _LOGGER.error(f"Error refreshing {key}: {result}")
+                data[key] = previous.get(key)
+                failed.add(key)
+            else:
+                data[key] = result
+        self.failed_keys |= failed
+        return data, timings, failed
+
+    async def _async_update_data(self):
+        start = time.monotonic()
+        cycle, token = self.api.stats.begin_cycle()
+        self.failed_keys = set()
+        try:
+            data = await self._async_fetch(self.data or {})
+        except Exception:
+            self._adapt_interval(stressed=True)
+            raise
+        finally:
+            self.api.stats.end_cycle(token)
+        data["timings"]["total"] = round(time.monotonic() - start, 3)
+        self.last_cycle = {**cycle, "duration": data["timings"]["total"], "finished_at": time.time()}
+        _LOGGER.debug(f"{self.tier} refresh finished in {data['timings']['total']}s with {cycle['requests']} requests: {data['timings']}")
+
+        self._track_changes(data)
+        if self._store is not None and self.changed and not self.failed_keys:
+            # Only tiers whose data moved are rewritten, and bursts of changes share one write; a cycle that
+            # kept old values for failed calls is not saved as the "last good" data
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        self._adapt_interval(
+            stressed=bool(cycle["errors"] or cycle["throttled"])
+            or self.last_cycle["duration"] > self.floor_interval * ADAPTIVE_SLOW_RATIO,
+            changing=bool(self.changed),
+        )
+        return data
+
+    def _adapt_interval(self, stressed=False, changing=False):
+        """Back off while the server struggles, and return to the configured floor once data moves again."""
+        if not self.adaptive:
+            return
+
+        current = self.update_interval.total_seconds()
+        if stressed:
+            interval = min(self.floor_interval * ADAPTIVE_MAX_FACTOR, current * 2) * random.uniform(0.9, 1.1)
+        elif changing:
+            interval = self.floor_interval
+        else:
+            interval = max(self.floor_interval, current * ADAPTIVE_DECAY)
+
+        interval = max(self.floor_interval, min(self.floor_interval * ADAPTIVE_MAX_FACTOR, interval))
+        if round(interval) != round(current):
+            _LOGGER.debug(f"{self.tier} polling interval {current:.0f}s -> {interval:.0f}s")
+        self.update_interval = timedelta(seconds=interval)
+
+    @callback
+    def async_boost(self):
+        """Poll at the configured floor again, e.g. right after we changed the policy ourselves."""
+        self.update_interval = timedelta(seconds=self.floor_interval)
+
+    def _track_changes(self, data):
+        revisions = {key: _fingerprint(data.get(key)) for key in self.sections}
+        for uid, rule in (data.get("rule_index") or {}).items():
+            revisions[("rule", uid)] = hash(rule.as_tuple())
+
+        self.changed = {key for key, revision in revisions.items() if self.revisions.get(key) != revision}
+        self.revisions = revisions
+        _LOGGER.debug(f"{self.tier}: {len(self.changed)} sections/rules changed, {self.suppressed_writes} state writes suppressed so far")
+
+    @callback
+    def async_add_change_listener(self, update_callback, key):
+        """Listen for updates, but only call back when `key` changed in the last refresh."""
+        # All change listeners share one coordinator listener, so a refresh costs one call per changed key
+        if not self._change_listeners:
+            self._unsub_change_listeners = self.async_add_listener(self._async_dispatch_changes)
+        self._change_listeners.setdefault(key, set()).add(update_callback)
+        self._change_listener_count += 1
+
+        @callback
+        def _remove():
+            listeners = self._change_listeners.get(key)
+            if listeners is None or update_callback not in listeners:
+                return
+            listeners.discard(update_callback)
+            self._change_listener_count -= 1
+            if not listeners:
+                del self._change_listeners[key]
+            if not self._change_listeners:
+                self._unsub_change_listeners()
+
+        return _remove
+
+    @callback
+    def _async_dispatch_changes(self):
+        notified = 0
+        for key in self.changed & self._change_listeners.keys():
+            for update_callback in list(self._change_listeners.get(key, ())):
+                update_callback()
+                notified += 1
+        self.suppressed_writes += self._change_listener_count - notified
+
+class CheckPointRulesCoordinator(CheckPointDataUpdateCoordinator):
+    """Access rules of one package; bodies are re-read on a new revision, hit counts by a cheaper pass in between."""
+
+    tier = "rules"
+    sections = RULE_COUNT_KEYS
+
+    derived_keys = ("timings", "rule_index")
+
+    def __init__(self, hass, api, package, interval, hits_interval=DEFAULT_HITS_INTERVAL, hits_window=DEFAULT_HITS_WINDOW, adaptive=True, storage_key=None):
+        super().__init__(hass, api, package, interval, adaptive, storage_key)
+        self.hits_interval = hits_interval
+        self.hits_window = hits_window
+        self.attributes = RuleAttributeCache(package, hits_window)
+
+        # Rules named by push events, re-read together once PUSH_DEBOUNCE has passed
+        self._queued_uids = set()
+        self._queued_full = False
+        self._unsub_queued = None
+
+        # The hits pass has its own timer, so neither slow (push mode) nor backed-off polling stretches it
+        self._hits_due = False
+        self._unsub_hits = None
+
+    def rule_attributes(self, uid):
+        rule = (self.data or {}).get("rule_index", {}).get(uid)
+        return self.attributes.get(rule) if rule is not None else {}
+
+    @callback
+    def async_queue_rules(self, uids, full=False):
+        """Re-read only `uids` soon, instead of waiting for the next poll; `full` falls back to a regular refresh."""
+        # The stored revision is left alone: audit records can be lost (syslog is UDP), so the next poll re-reads once
+        index = (self.data or {}).get("rule_index", {})
+        self._queued_uids.update(uid for uid in uids if uid in index)
+        self._queued_full |= full
+        if self._unsub_queued is None and (self._queued_uids or full):
+            self._unsub_queued = async_call_later(self.hass, PUSH_DEBOUNCE, self._async_refresh_queued)
+
+    async def async_start(self, entry=None):
+        await super().async_start(entry)
+        if self.hits_interval and self._unsub_hits is None:
+            self._unsub_hits = async_track_time_interval(self.hass, self._async_hits_due, timedelta(seconds=self.hits_interval))
+
+    async def _async_hits_due(self, now):
+        self._hits_due = True
+        await self.async_request_refresh()
+
+    async def async_shutdown(self):
+        # Neither a queued push refresh nor the hits timer may fire against a client that was already released
+        for unsub in (self._unsub_queued, self._unsub_hits):
+            if unsub is not None:
+                unsub()
+        self._unsub_queued = self._unsub_hits = None
+        await super().async_shutdown()
+
+    async def _async_refresh_queued(self, now):
+        self._unsub_queued = None
+        uids, self._queued_uids = self._queued_uids, set()
+        full, self._queued_full = self._queued_full, False
+
+        previous = self.data or {}
+        if full or not previous.get("rules") or len(uids) > PUSH_MAX_TARGETED:
+            await self.async_request_refresh()
+            return
+
+        # A full refresh since they were queued may have removed some of them
+        index = previous["rule_index"]
+        uids = [uid for uid in uids if uid in index]
+        fetched = await asyncio.gather(*(self.api.get_access_rule(uid, index[uid].layer, self.hits_window) for uid in uids))
+        updated = {}
+        for uid, rule in zip(uids, fetched):
+            if rule:
+                old = index[uid]
+                updated[uid] = RuleRecord.from_api(rule, old.layer, section=old.section, parent=old.parent)
+        _LOGGER.debug(f"Push refresh of {len(uids)} rules in {self.package}: {len(updated)} re-read")
+
+        # Polls may have landed while the reads were in flight; patch their result, not the copy taken before
+        current = self.data or {}
+        if current.get("revision") != previous.get("revision") or not current.get("rules"):
+            _LOGGER.debug(f"Rules of {self.package} were re-read meanwhile, dropping the push refresh")
+            return
+        data = {**current}
+        data["rules"] = [updated.get(rule.uid, rule) for rule in current["rules"]]
+        data["rule_index"] = index_rules(data["rules"])
+        self.attributes.prune(data["rule_index"])
+        self._track_changes(data)
+        if self._store is not None and self.changed:
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        self.async_set_updated_data(data)
+
+    def _restore(self, snapshot):
+        data = super()._restore(snapshot)
+        data["rules"] = [RuleRecord.from_list(row) for row in data.get("rules") or []]
+        data["rule_index"] = index_rules(data.get("rules"))
+        return data
+
+    def _snapshot(self):
+        snapshot = super()._snapshot()
+        snapshot["rules"] = [rule.as_list() for rule in snapshot.get("rules") or []]
+        return snapshot
+
+    async def _async_fetch(self, previous):
+        revision = await self.api.get_revision()
+        now = time.time()
+
+        if (
+            not previous.get("rules")
+            or revision is None
+            or revision != previous.get("revision")
+            or now - previous.get("synced_at", 0) >= FULL_SYNC_INTERVAL
+        ):
+            if previous.get("revision") is not None and revision != previous.get("revision"):
+                # A publish can change the package's layers; don't resolve them from a cached show-package
+                self.api.invalidate_cache()
+            data, timings, failed = await self._fan_out({
+                "rules": lambda: self.api.get_all_access_rules(self.package, self.hits_window),
+                "nat_rules": lambda: self.api.get_object_count(API_ENDPOINTS["nat_rules"], self.package),
+            }, previous)
+            if "rules" in failed:
+                # The kept rules predate this revision; stamping them would hide the change until the next full sync
+                data.update(
+                    revision=previous.get("revision"),
+                    synced_at=previous.get("synced_at", 0),
+                    hits_synced_at=previous.get("hits_synced_at", 0),
+                )
+            else:
+                data.update(revision=revision, synced_at=now, hits_synced_at=now)
+                self._hits_due = False
+                self.live = True
+        elif self._hits_due or now - previous.get("hits_synced_at", 0) >= self.hits_interval:
+            self._hits_due = False
+            self.live = True
+            # Every layer of the last full fetch, inline layers included
+            layers = list(dict.fromkeys(rule.layer for rule in previous["rules"]))
+            fetched, timings, _ = await self._fan_out({
+                "hits": lambda: self.api.get_rule_hits(self.package, self.hits_window, layers)
+            }, {}, required=False)
+            data = {**previous}
+            if fetched["hits"]:
+                hits = fetched["hits"]
+                # Rules whose counts did not move keep their record, and with it their cached attributes
+                data["rules"] = [
+                    rule.with_hits(hits[rule.uid]) if rule.uid in hits else rule
+                    for rule in previous["rules"]
+                ]
+                data["hits_synced_at"] = now
+        else:
+            self.live = True
+            data = {**previous}
+            timings = {}
+
+        data["rule_index"] = index_rules(data.get("rules"))
+        self.attributes.prune(data["rule_index"])
+        data["access_rules"] = {"total": len(data.get("rules") or []), "names": []}
+        await self._async_fetch_names(data, previous, timings)
+        data["timings"] = timings
+        return data
+
+class CheckPointObjectsCoordinator(CheckPointDataUpdateCoordinator):
+    """Object counts and the gateway inventory, shared by every entry on the server (`package` is unused)."""
+
+    tier = "objects"
+    sections = (*(key for key in API_ENDPOINTS if key not in RULE_COUNT_KEYS), "gateways")
+
+    def __init__(self, hass, api, package, interval, incremental=True, adaptive=True, storage_key=None):
+        super().__init__(hass, api, package, interval, adaptive, storage_key)
+        self.incremental = incremental
+
+    async def _async_fetch(self, previous):
+        # Nothing published since the last full sync means the objects and gateways are unchanged
+        revision = await self.api.get_revision() if self.incremental else None
+        if (
+            revision is not None
+            and revision == previous.get("revision")
+            and time.time() - previous.get("synced_at", 0) < FULL_SYNC_INTERVAL
+        ):
+            self.live = True
+            data = {**previous}
+            timings = {}
+        else:
+            if previous.get("revision") is not None and revision != previous.get("revision"):
+                # Something was published elsewhere; cached layer lists may be stale
+                self.api.invalidate_cache()
+
+            calls = {
+                key: (lambda endpoint=endpoint: self.api.get_object_count(endpoint, self.package))
+                for key, endpoint in API_ENDPOINTS.items()
+                if key not in RULE_COUNT_KEYS
+            }
+            calls["gateways"] = self.api.get_gateways_and_servers
+
+            data, timings, failed = await self._fan_out(calls, previous)
+            # What the gateway sensors follow; a failed count alone does not make the inventory stale
+            self.live |= "gateways" not in failed
+            if failed:
+                # Leave the revision behind, so the next poll retries instead of trusting kept values for an hour
+                data["revision"] = previous.get("revision")
+                data["synced_at"] = previous.get("synced_at", 0)
+            else:
+                data["revision"] = revision
+                data["synced_at"] = time.time()
+
+        await self._async_fetch_names(data, previous, timings)
+        data["timings"] = timings
+        return data
+
+class CheckPointStatusCoordinator(CheckPointDataUpdateCoordinator):
+    """License and Infinity Services status, which rarely change."""
+
+    tier = "status"
+    sections = ("license", "cloud_services")
+
+    async def _async_fetch(self, previous):
+        data, timings, _ = await self._fan_out({
+            "license": self.api.verify_management_license,
+            "cloud_services": self.api.show_cloud_services,
+        }, previous)
+        data["timings"] = timings
+        return data
@@ -0,0 +1,27 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_WEBHOOK_ID
+from .const import DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, CONF_WEBHOOK_ID}
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    api = entry_data["api"]
+    receiver = entry_data.get("push")
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "api": api.stats.as_dict(),
+        "installs": api.installs,
+        "push": receiver.as_dict() if receiver else None,
+        "tiers": {
+            tier: {
+                "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+                "last_update_success": coordinator.last_update_success,
+                "last_cycle": coordinator.last_cycle,
+                "timings": (coordinator.data or {}).get("timings"),
+                "suppressed_writes": coordinator.suppressed_writes,
+            }
+            for tier, coordinator in entry_data["coordinators"].items()
+        },
+    }
@@ -0,0 +1,91 @@
+import asyncio
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from .const import DOMAIN, ENTITY_CHUNK_SIZE
+
+class CheckPointEntityReconciler:
+    """Keeps one entity per item in a coordinator's data, adding new items and removing orphans.
+
+    `items(data)` returns the current items, or None when the data doesn't say;
+    `key(item)` is the unique id suffix after `prefix`, and `factory(item)`
+    builds the entity.
+    """
+
+    def __init__(self, hass, entry, coordinator, platform, prefix, items, key, factory, async_add_entities):
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        self.platform = platform
+        self.prefix = prefix
+        self.items = items
+        self.key = key
+        self.factory = factory
+        self.async_add_entities = async_add_entities
+        self.registry = er.async_get(hass)
+        self.entities = {}
+        self._swept = False
+
+    async def async_start(self):
+        # A plain listener, tied to the entry: the first live refresh has to be seen even when it changes nothing
+        self.entry.async_on_unload(self.coordinator.async_add_listener(self.async_reconcile))
+        await self._async_add(self._build(self.items(self.coordinator.data or {}) or []))
+        self.async_reconcile()
+
+    async def _async_add(self, entities):
+        # Thousands of rules are added a chunk at a time, handing the event loop back in between
+        for start in range(0, len(entities), ENTITY_CHUNK_SIZE):
+            self.async_add_entities(entities[start:start + ENTITY_CHUNK_SIZE])
+            await asyncio.sleep(0)
+
+    def _build(self, items):
+        new_entities = {}
+        for item in items:
+            key = self.key(item)
+            if key not in self.entities and key not in new_entities:
+                new_entities[key] = self.factory(item)
+        self.entities.update(new_entities)
+        return list(new_entities.values())
+
+    @callback
+    def _async_remove(self, key):
+        entity = self.entities.pop(key, None)
+        entity_id = self.registry.async_get_entity_id(self.platform, DOMAIN, f"{self.prefix}{key}")
+        registry_entry = self.registry.async_get(entity_id) if entity_id else None
+        # Another entry on the server can list the same item; never touch its entity
+        if registry_entry is not None and registry_entry.config_entry_id == self.entry.entry_id:
+            self.registry.async_remove(entity_id)
+        elif entity is not None and entity.hass is not None:
+            self.hass.async_create_task(entity.async_remove())
+
+    @callback
+    def _async_sweep_registry(self, keys):
+        # Items removed while Home Assistant was not running only show up as registry entries
+        for registry_entry in er.async_entries_for_config_entry(self.registry, self.entry.entry_id):
+            if registry_entry.domain == self.platform and registry_entry.unique_id.startswith(self.prefix):
+                key = registry_entry.unique_id.removeprefix(self.prefix)
+                if key not in keys:
+                    self._async_remove(key)
+
+    @callback
+    def async_reconcile(self):
+        """Diff the items of the last refresh against our entities: add the new ones, remove the orphans."""
+        items = self.items(self.coordinator.data or {})
+        # A failed refresh keeps (or never had) the old items, which must not be read as "every item was deleted"
+        if not self.coordinator.last_update_success or items is None:
+            return
+        items = list(items)
+        keys = {self.key(item) for item in items}
+
+        # A snapshot can miss items added shortly before it was written, so only live data removes anything
+        if self.coordinator.live:
+            if not self._swept:
+                self._swept = True
+                self._async_sweep_registry(keys)
+            for key in [key for key in self.entities if key not in keys]:
+                self._async_remove(key)
+
+        new_entities = self._build(items)
+        if new_entities:
+            self.entry.async_create_background_task(
+                self.hass, self._async_add(new_entities), f"{DOMAIN} add {self.platform} entities"
+            )
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Log Exporter syslog/Splunk style: key:"value"; and key="value" pairs
+QUOTED_FIELD = re.compile(r'([\w.-]+)[:=]"((?:[^"\\]|\\.)*)"')
+
+# CEF extension: key=value up to the next key=
+CEF_FIELD = re.compile(r'(\w+)=((?:\\=|[^=])*?)(?=\s+\w+=|\s*$)')
+
+RULE_UID_FIELDS = ("rule_uid", "ruleuid", "match_rule_uid", "access_rule_uid")
+
+# Audit operations that add or remove rules, which only a full rulebase read can pick up
+STRUCTURAL_OPERATIONS = ("add", "create", "delete", "remove", "move", "paste")
+
+def _normalize_key(key):
+    return re.sub(r"[\s-]+", "_", key.strip().lower())
+
+def _normalize_uid(uid):
+    # Webhook JSON may carry the uid as a number
+    return str(uid).strip().strip("{}").lower() if uid else None
+
+def parse_fields(line):
+    """Parse one syslog, CEF or key/value log line into a flat dict of normalized field names."""
+    fields = {}
+    if "CEF:" in line:
+        header = line.split("CEF:", 1)[1].split("|", 7)
+        if len(header) == 8:
+            fields["product"] = header[2]
+            fields["name"] = header[5]
+            extension = dict(CEF_FIELD.findall(header[7]))
+            for key, value in extension.items():
+                label = extension.get(f"{key}Label")
+                if label:
+                    fields[_normalize_key(label)] = value
+                elif not key.endswith("Label"):
+                    fields[_normalize_key(key)] = value
+        return fields
+
+    for key, value in QUOTED_FIELD.findall(line):
+        fields[_normalize_key(key)] = value
+    return fields
+
+def classify(fields):
+    """Return (kind, rule uid, structural) for a parsed event, or None if it does not concern the policy.
+
+    kind is "publish" (a session was published or a policy installed), "change"
+    (an audit record touching a rule, not yet visible until the next publish)
+    or "hit" (a traffic log that matched a rule).
+    """
+    fields = {_normalize_key(key): value for key, value in fields.items()}
+    operation = str(fields.get("operation", "")).lower()
+    if "publish" in operation or "install policy" in operation:
+        return "publish", None, False
+
+    uid = next((fields[key] for key in RULE_UID_FIELDS if fields.get(key)), None)
+    if operation or "administrator" in fields:
+        object_type = str(fields.get("objecttype") or fields.get("object_type") or "").lower()
+        if uid is None and "rule" in object_type:
+            uid = fields.get("uid") or fields.get("objectuid") or fields.get("object_uid")
+        if uid is None and "rule" not in object_type:
+            return None
+        return "change", _normalize_uid(uid), any(word in operation for word in STRUCTURAL_OPERATIONS)
+
+    if uid:
+        return "hit", _normalize_uid(uid), False
+    return None
+
+class CheckPointPushReceiver:
+    """Turns change and audit notifications into targeted refreshes, so polling can stay slow.
+
+    Events arrive through the entry webhooks or a local syslog/CEF listener.
+    Audit records name the rules an administrator touched; they are collected
+    until the matching publish, and then only those rules are re-read by each
+    package's rules coordinator. Traffic logs are counted but re-read nothing:
+    hit counts are the expensive query and have their own timer. Anything the receiver cannot map to rules (a rule was
+    added or removed, or the publish came without audit records) falls back to
+    a regular refresh.
+    """
+
+    def __init__(self, hass):
+        self.hass = hass
+        self.rules_coordinators = set()
+        self.publish_coordinators = set()
+        self.events = 0
+        self.ignored = 0
+        self.last_event_at = None
+        self.syslog_port = None
+        self._changed_uids = set()
+        self._structural = False
+        self._transport = None
+
+    @callback
+    def async_add_rules_coordinator(self, coordinator):
+        self.rules_coordinators.add(coordinator)
+        return lambda: self.rules_coordinators.discard(coordinator)
+
+    @callback
+    def async_handle_fields(self, fields):
+        event = classify(fields)
+        if event is None:
+            self.ignored += 1
+            return
+        self.events += 1
+        self.last_event_at = time.time()
+        kind, uid, structural = event
+
+        if kind == "change":
+            if uid:
+                self._changed_uids.add(uid)
+            self._structural |= structural or uid is None
+        elif kind == "publish":
+            uids, self._changed_uids = self._changed_uids, set()
+            full, self._structural = self._structural or not uids, False
+            for coordinator in self.rules_coordinators:
+                coordinator.async_queue_rules(uids, full=full)
+            for coordinator in self.publish_coordinators:
+                self.hass.async_create_task(coordinator.async_request_refresh())
+
+    @callback
+    def async_handle_text(self, text):
+        for line in text.splitlines():
+            if line.strip():
+                self.async_handle_fields(parse_fields(line))
+
+    @callback
+    def async_handle_json(self, payload):
+        """Accept one event, a list of events, or {"events": [...]}; an event is a field dict or {"log": line}."""
+        if isinstance(payload, dict) and "events" in payload:
+            payload = payload["events"]
+        for event in payload if isinstance(payload, list) else [payload]:
+            if isinstance(event, str):
+                self.async_handle_text(event)
+            elif isinstance(event, dict) and isinstance(event.get("log"), str):
+                self.async_handle_text(event["log"])
+            elif isinstance(event, dict):
+                self.async_handle_fields(event)
+
+    async def async_handle_webhook(self, hass, webhook_id, request):
+        body = await request.text()
+        try:
+            self.async_handle_json(json.loads(body))
+        except ValueError:
+            self.async_handle_text(body)
+
+    async def async_start_syslog(self, port, host="0.0.0.0"):
+        """Listen for Log Exporter syslog/CEF datagrams on UDP `port`."""
+        if self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(lambda: _SyslogProtocol(self), local_addr=(host, port))
+        self.syslog_port = self._transport.get_extra_info("sockname")[1]
+        _LOGGER.info(f"Listening for Check Point log export on UDP port {self.syslog_port}")
+
+    def stop(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def as_dict(self):
+        return {
+            "events": self.events,
+            "ignored": self.ignored,
+            "last_event_at": self.last_event_at,
+            "syslog_port": self.syslog_port,
+            "pending_rule_changes": len(self._changed_uids),
+        }
+
+class _SyslogProtocol(asyncio.DatagramProtocol):
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        try:
+            self.receiver.async_handle_text(data.decode("utf-8", errors="replace"))
+        except Exception as e:
+            _LOGGER.debug(f"Could not handle log event from {addr[0]}: {e}")
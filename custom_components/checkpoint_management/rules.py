@@ -0,0 +1,222 @@
+import sys
+from .const import DEFAULT_HITS_WINDOW, ATTRIBUTE_MAX_MEMBERS
+
+# Rule fields that hold object references, rendered as comma-joined names
+REFERENCE_LIST_FIELDS = {
+    "source": "source",
+    "destination": "destination",
+    "service": "service",
+    "install_on": "install-on",
+    "time": "time",
+    "content": "content",
+}
+
+FLAG_FIELDS = {
+    "source_negate": "source-negate",
+    "destination_negate": "destination-negate",
+    "service_negate": "service-negate",
+}
+
+def iter_rulebase(rulebase):
+    """Yield (rule, section path) for every rule in a nested access or NAT rulebase, in document order.
+
+    Walks the sections with an explicit stack of iterators instead of recursing
+    and copying lists, so deep policies are streamed one rule at a time.
+    """
+    stack = [(iter(rulebase), ())]
+    while stack:
+        items, path = stack[-1]
+        for item in items:
+            if "rulebase" in item:
+                stack.append((iter(item["rulebase"]), path + (item["name"],) if item.get("name") else path))
+                break
+            if "rule-number" in item:
+                yield item, path
+        else:
+            stack.pop()
+
+def nest_inline_rules(rules, children):
+    """Order rules so that the rules of each inline layer follow the rule that applies it."""
+    ordered = []
+    stack = [iter(rules)]
+    while stack:
+        for rule in stack[-1]:
+            ordered.append(rule)
+            if rule.uid in children:
+                stack.append(iter(children.pop(rule.uid)))
+                break
+        else:
+            stack.pop()
+    return ordered
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _ref_name(value, objects):
+    """Name of an object reference, which is either an inline object or a uid into the objects-dictionary."""
+    if isinstance(value, dict):
+        return _intern(value.get("name") or value.get("uid"))
+    if isinstance(value, str):
+        return _intern(objects.get(value, value))
+    return value
+
+class RuleRecord:
+    """Slim, read-only view of one access rule, holding only what a rule switch shows.
+
+    Object references are reduced to interned names, and identical name tuples
+    (the many "Any" sources, the same service groups, ...) are shared across
+    records through the `shared` table passed to from_api(). The raw API dict
+    is not kept. `section` is the path of section names above the rule,
+    `inline_layer` the layer an "Apply Layer" rule hands over to, and `parent`
+    the uid of the rule whose inline layer this rule lives in.
+    """
+
+    __slots__ = (
+        "uid", "name", "number", "layer", "enabled", "action", "track", "comments", "vpn",
+        "source", "destination", "service", "install_on", "time", "content",
+        "source_negate", "destination_negate", "service_negate",
+        "hits", "hits_percentage", "last_hit", "section", "inline_layer", "parent",
+    )
+
+    TUPLE_FIELDS = ("source", "destination", "service", "install_on", "time", "content", "section")
+
+    @classmethod
+    def from_api(cls, rule, layer, objects=None, shared=None, section=(), parent=None):
+        objects = objects or {}
+        shared = {} if shared is None else shared
+        record = cls.__new__(cls)
+        record.uid = rule.get("uid")
+        record.name = rule.get("name")
+        record.number = rule.get("rule-number")
+        record.layer = _intern(layer)
+        record.enabled = rule.get("enabled", False)
+        record.action = _ref_name(rule.get("action"), objects)
+        track = rule.get("track")
+        record.track = _ref_name(track.get("type"), objects) if isinstance(track, dict) else _ref_name(track, objects)
+        record.comments = rule.get("comments") or None
+        vpn = rule.get("vpn")
+        record.vpn = ", ".join(_ref_name(v, objects) for v in vpn) if isinstance(vpn, list) else _ref_name(vpn, objects)
+
+        for field, key in REFERENCE_LIST_FIELDS.items():
+            value = rule.get(key)
+            if value is None:
+                setattr(record, field, None)
+                continue
+            names = tuple(_ref_name(item, objects) for item in (value if isinstance(value, list) else [value]))
+            setattr(record, field, shared.setdefault(names, names))
+
+        for field, key in FLAG_FIELDS.items():
+            setattr(record, field, rule.get(key))
+
+        record.section = shared.setdefault(section, section)
+        record.inline_layer = _ref_name(rule.get("inline-layer"), objects)
+        record.parent = parent
+
+        record.hits = record.hits_percentage = record.last_hit = None
+        record._set_hits(rule.get("hits"))
+        return record
+
+    @staticmethod
+    def _hit_fields(hits):
+        last_date = hits.get("last-date")
+        return hits.get("value", 0), hits.get("percentage"), last_date.get("iso-8601") if isinstance(last_date, dict) else last_date
+
+    def _set_hits(self, hits):
+        if isinstance(hits, dict):
+            self.hits, self.hits_percentage, self.last_hit = self._hit_fields(hits)
+
+    def with_hits(self, hits):
+        """A copy with new hit counts, or this very record if they did not move (so caches keyed on it stay valid)."""
+        if not isinstance(hits, dict) or self._hit_fields(hits) == (self.hits, self.hits_percentage, self.last_hit):
+            return self
+        record = self.from_list(self.as_list())
+        record._set_hits(hits)
+        return record
+
+    @property
+    def display_name(self):
+        return self.name or f"Rule {self.number}"
+
+    def as_tuple(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def as_list(self):
+        return list(self.as_tuple())
+
+    @classmethod
+    def from_list(cls, values):
+        record = cls.__new__(cls)
+        for field, value in zip(cls.__slots__, values):
+            if field in cls.TUPLE_FIELDS and value is not None:
+                value = tuple(value)
+            setattr(record, field, _intern(value) if field in ("layer", "action", "track", "inline_layer") else value)
+        return record
+
+def _join(names):
+    # Groups with thousands of members would otherwise produce megabyte-sized state attributes
+    if len(names) <= ATTRIBUTE_MAX_MEMBERS:
+        return ", ".join(str(name) for name in names)
+    shown = ", ".join(str(name) for name in names[:ATTRIBUTE_MAX_MEMBERS])
+    return f"{shown}, ... (+{len(names) - ATTRIBUTE_MAX_MEMBERS} more)"
+
+def build_rule_attributes(rule, package, hits_window=DEFAULT_HITS_WINDOW):
+    attributes = {
+        "policy_package": package,
+        "layer": rule.layer or "Network"
+    }
+
+    if rule.action is not None:
+        attributes["action"] = rule.action
+    for field, key in REFERENCE_LIST_FIELDS.items():
+        names = getattr(rule, field)
+        if names is not None:
+            attributes[key] = _join(names)
+    for field, key in FLAG_FIELDS.items():
+        value = getattr(rule, field)
+        if value is not None:
+            attributes[key] = value
+    if rule.track is not None:
+        attributes["track"] = rule.track
+    if rule.vpn is not None:
+        attributes["vpn"] = rule.vpn
+    if rule.comments:
+        attributes["comments"] = rule.comments
+    if rule.section:
+        attributes["section"] = " / ".join(rule.section)
+    if rule.inline_layer:
+        attributes["inline_layer"] = rule.inline_layer
+    if rule.parent:
+        attributes["parent_rule"] = rule.parent
+
+    if rule.hits is not None:
+        attributes["hits"] = rule.hits
+        attributes["hits_window_hours"] = hits_window
+        attributes["hits_percentage"] = rule.hits_percentage
+        attributes["last_hit"] = rule.last_hit
+    return attributes
+
+def index_rules(rules):
+    """Key every rule by uid, so entities never scan the list."""
+    return {rule.uid: rule for rule in rules or [] if rule.uid is not None}
+
+class RuleAttributeCache:
+    """Switch attributes, built the first time a switch asks and reused until its rule record is replaced.
+
+    Records are never mutated, so the record itself identifies the rule
+    revision. Disabled switches never ask, so nothing is built for them.
+    """
+
+    def __init__(self, package, hits_window=DEFAULT_HITS_WINDOW):
+        self.package = package
+        self.hits_window = hits_window
+        self._entries = {}
+
+    def get(self, rule):
+        entry = self._entries.get(rule.uid)
+        if entry is None or entry[0] is not rule:
+            entry = self._entries[rule.uid] = (rule, build_rule_attributes(rule, self.package, self.hits_window))
+        return entry[1]
+
+    def prune(self, index):
+        for uid in [uid for uid, (rule, _) in self._entries.items() if index.get(uid) is not rule]:
+            del self._entries[uid]
@@ -1,23 +1,53 @@
 from homeassistant.components.sensor import SensorEntity
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.const import CONF_HOST
-from .const import DOMAIN, API_ENDPOINTS
+from .const import DOMAIN, API_ENDPOINTS, NAMED_KEYS, RULE_COUNT_KEYS
+from .lifecycle import CheckPointEntityReconciler
+
+DIAGNOSTIC_SENSORS = {
+    "refresh_duration": ("Refresh Duration", "s"),
+    "slowest_endpoint": ("Slowest Endpoint", None),
+    "requests_per_cycle": ("Requests per Cycle", None),
+    "last_api_error": ("Last API Error", None),
+    "sid_reuse_rate": ("Session Reuse Rate", "%"),
+}
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    coordinators = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+    objects_coordinator = coordinators["objects"]
+    rules_coordinator = coordinators["rules"]
+    status_coordinator = coordinators["status"]
     host = entry.data[CONF_HOST]
     
-    sensors = [CheckPointSensor(coordinator, key, host, entry.entry_id) for key in API_ENDPOINTS.keys()]
-    sensors.append(CheckPointLicenseSensor(coordinator, host, entry.entry_id))
-    sensors.append(CheckPointCloudServicesSensor(coordinator, host, entry.entry_id))
+    sensors = [
+        CheckPointSensor(rules_coordinator if key in RULE_COUNT_KEYS else objects_coordinator, key, host, entry.entry_id)
+        for key in API_ENDPOINTS.keys()
+    ]
+    sensors.append(CheckPointLicenseSensor(status_coordinator, host, entry.entry_id))
+    sensors.append(CheckPointCloudServicesSensor(status_coordinator, host, entry.entry_id))
     
-    gateways_data = coordinator.data.get("gateways", {})
-    gateway_types = gateways_data.get("types", {}).keys()
-    for gw_type in gateway_types:
-        sensors.append(CheckPointGatewayTypeSensor(coordinator, gw_type, host, entry.entry_id))
+    api = hass.data[DOMAIN][entry.entry_id]["api"]
+    sensors.append(CheckPointPolicyInstallSensor(api, hass.data[DOMAIN][entry.entry_id]["package"], host, entry.entry_id))
+    for kind in DIAGNOSTIC_SENSORS:
+        sensors.append(CheckPointDiagnosticSensor(coordinators, api, kind, host, entry.entry_id))
     
     async_add_entities(sensors)
 
+    # The objects tier is shared, so the gateway sensors follow it for as long as the entry is loaded
+    await CheckPointEntityReconciler(
+        hass, entry, objects_coordinator, "sensor", f"cp_{entry.entry_id}_gw_type_",
+        items=_gateway_types,
+        key=str.lower,
+        factory=lambda gw_type: CheckPointGatewayTypeSensor(objects_coordinator, gw_type, host, entry.entry_id),
+        async_add_entities=async_add_entities,
+    ).async_start()
+
+def _gateway_types(data):
+    gateways = data.get("gateways")
+    return None if gateways is None else gateways.get("types", {})
+
 class CheckPointSensor(SensorEntity):
     def __init__(self, coordinator, key, host, entry_id):
         self.coordinator = coordinator
@@ -63,7 +93,7 @@ class CheckPointSensor(SensorEntity):
         if isinstance(data, dict):
             names = data.get("names", [])
             # Only populate the lists for the specific endpoints you requested
-            if self.key in ["access_layers", "networks", "hosts", "nat_rules"] and names:
+            if self.key in NAMED_KEYS and names:
                 return {"object_names": names}
         return None
 
@@ -75,7 +105,9 @@ class CheckPointSensor(SensorEntity):
         await self.coordinator.async_request_refresh()
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_change_listener(self.async_write_ha_state, self.key))
+        if self.key in NAMED_KEYS:
+            self.coordinator.async_request_names(self.key)
 
 class CheckPointGatewayTypeSensor(SensorEntity):
     def __init__(self, coordinator, gw_type, host, entry_id):
@@ -105,7 +137,7 @@ class CheckPointGatewayTypeSensor(SensorEntity):
         return False
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_change_listener(self.async_write_ha_state, "gateways"))
 
 class CheckPointLicenseSensor(SensorEntity):
     def __init__(self, coordinator, host, entry_id):
@@ -145,7 +177,7 @@ class CheckPointLicenseSensor(SensorEntity):
         return False
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_change_listener(self.async_write_ha_state, "license"))
 
 class CheckPointCloudServicesSensor(SensorEntity):
     def __init__(self, coordinator, host, entry_id):
@@ -183,4 +215,109 @@ class CheckPointCloudServicesSensor(SensorEntity):
         return False
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_change_listener(self.async_write_ha_state, "cloud_services"))
+
+class CheckPointPolicyInstallSensor(SensorEntity):
+    """State of the last policy install of the package, updated while show-task is being polled."""
+
+    def __init__(self, api, package, host, entry_id):
+        self.api = api
+        self.package = package
+        self.host = host
+        self.entry_id = entry_id
+        self._attr_name = f"Policy Install ({package})"
+        self._attr_unique_id = f"cp_{self.entry_id}_policy_install_{package}"
+        self._attr_icon = "mdi:shield-sync"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.entry_id)},
+            name=f"Check Point Management ({self.host})",
+            manufacturer="Check Point",
+            model="Management Server"
+        )
+
+    @property
+    def native_value(self):
+        install = self.api.installs.get(self.package)
+        return install["state"] if install else "idle"
+
+    @property
+    def extra_state_attributes(self):
+        return dict(self.api.installs.get(self.package, {}))
+
+    @property
+    def should_poll(self):
+        return False
+
+    async def async_added_to_hass(self):
+        @callback
+        def _install_updated(package, install):
+            if package == self.package:
+                self.async_write_ha_state()
+
+        self.async_on_remove(self.api.add_install_listener(_install_updated))
+
+class CheckPointDiagnosticSensor(SensorEntity):
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinators, api, kind, host, entry_id):
+        self.coordinators = coordinators
+        self.api = api
+        self.kind = kind
+        self.host = host
+        self.entry_id = entry_id
+        name, unit = DIAGNOSTIC_SENSORS[kind]
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_unique_id = f"cp_{self.entry_id}_diag_{kind}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.entry_id)},
+            name=f"Check Point Management ({self.host})",
+            manufacturer="Check Point",
+            model="Management Server"
+        )
+
+    @property
+    def native_value(self):
+        stats = self.api.stats
+        if self.kind == "refresh_duration":
+            return self.coordinators["rules"].last_cycle.get("duration")
+        if self.kind == "requests_per_cycle":
+            return self.coordinators["rules"].last_cycle.get("requests")
+        if self.kind == "slowest_endpoint":
+            slowest = stats.slowest_endpoint()
+            return slowest[0] if slowest else None
+        if self.kind == "last_api_error":
+            return stats.last_error[:255] if stats.last_error else None
+        if self.kind == "sid_reuse_rate":
+            return stats.sid_reuse_rate
+        return None
+
+    @property
+    def extra_state_attributes(self):
+        stats = self.api.stats
+        if self.kind == "refresh_duration":
+            return {tier: coordinator.last_cycle.get("duration") for tier, coordinator in self.coordinators.items()}
+        if self.kind == "requests_per_cycle":
+            return {tier: coordinator.last_cycle.get("requests") for tier, coordinator in self.coordinators.items()}
+        if self.kind == "slowest_endpoint":
+            slowest = stats.slowest_endpoint()
+            return {"duration": round(slowest[1], 3)} if slowest else None
+        if self.kind == "last_api_error":
+            return {"endpoint": stats.last_error_endpoint, "at": stats.last_error_at}
+        if self.kind == "sid_reuse_rate":
+            return {"logins": stats.logins, "requests": stats.requests}
+        return None
+
+    @property
+    def should_poll(self):
+        return False
+
+    async def async_added_to_hass(self):
+        for coordinator in self.coordinators.values():
+            self.async_on_remove(coordinator.async_add_listener(self.async_write_ha_state))
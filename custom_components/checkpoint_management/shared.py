@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import timedelta
+from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_PORT, CONF_USERNAME, CONF_PASSWORD
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import slugify
+from .const import (
+    DOMAIN, CONF_DOMAIN, CONF_VERIFY_SSL, CONF_CONNECTION_LIMIT, CONF_MAX_CONCURRENCY, CONF_INCREMENTAL_SYNC,
+    CONF_OBJECTS_INTERVAL, CONF_STATUS_INTERVAL, CONF_ADAPTIVE_POLLING, DEFAULT_CONNECTION_LIMIT, DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_OBJECTS_INTERVAL, DEFAULT_STATUS_INTERVAL
+)
+from .api import CheckPointApiClient, create_transport
+from .batch import CheckPointRuleBatcher
+from .coordinator import CheckPointObjectsCoordinator, CheckPointStatusCoordinator
+from .push import CheckPointPushReceiver
+
+_LOGGER = logging.getLogger(__name__)
+
+SHARED_TIERS = ("objects", "status")
+
+# Read from the first entry that sets up a server; later entries on it inherit them
+SHARED_SETTINGS = (
+    CONF_OBJECTS_INTERVAL, CONF_STATUS_INTERVAL, CONF_CONNECTION_LIMIT, CONF_MAX_CONCURRENCY, CONF_INCREMENTAL_SYNC
+)
+
+def transport_key(data):
+    return (data[CONF_HOST], data[CONF_PORT], data.get(CONF_VERIFY_SSL, False))
+
+def server_key(data):
+    """Entries with the same key share one API client, one login and the global object and status tiers."""
+    return (data[CONF_HOST], data[CONF_PORT], data[CONF_USERNAME], data.get(CONF_DOMAIN) or None)
+
+def server_storage_key(data):
+    host, port, username, domain = server_key(data)
+    return f"{DOMAIN}." + slugify(f"{host}_{port}_{username}_{domain or 'default'}")
+
+async def async_acquire_server(hass, entry):
+    """Return the shared state for the entry's server, setting it up if this is the first entry on it.
+
+    Every entry on the same server and domain gets the same API client and the
+    same objects and status coordinators, reference-counted by entry id. Entries
+    on different domains of one Multi-Domain Server get their own client (each
+    domain needs its own login) but share one pooled HTTP transport.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    servers = domain_data.setdefault("servers", {})
+    key = server_key(entry.data)
+
+    server = servers.get(key)
+    if server is None:
+        server = servers[key] = {"entries": set()}
+        server["setup"] = hass.async_create_task(_async_setup_server(hass, entry, server))
+    server["entries"].add(entry.entry_id)
+
+    try:
+        await asyncio.shield(server["setup"])
+    except Exception:
+        await async_release_server(hass, entry)
+        raise
+    return server
+
+async def _async_setup_server(hass, entry, server):
+    # This task has its own context: unbind it from the entry that triggered it, so the
+    # shared coordinators are not tied to (and shut down with) that one entry
+    config_entries.current_entry.set(None)
+
+    data = entry.data
+    transports = hass.data[DOMAIN].setdefault("transports", {})
+    transport = transports.get(transport_key(data))
+    if transport is None or transport["session"].closed:
+        transport = transports[transport_key(data)] = {
+            "session": create_transport(data.get(CONF_VERIFY_SSL, False), data.get(CONF_CONNECTION_LIMIT, DEFAULT_CONNECTION_LIMIT)),
+            "servers": 0,
+        }
+    transport["servers"] += 1
+
+    api = server["api"] = CheckPointApiClient(
+        data[CONF_HOST],
+        data[CONF_PORT],
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        data.get(CONF_VERIFY_SSL, False),
+        session=transport["session"],
+        connection_limit=data.get(CONF_CONNECTION_LIMIT, DEFAULT_CONNECTION_LIMIT),
+        max_concurrency=data.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+        domain=data.get(CONF_DOMAIN)
+    )
+
+    adaptive = data.get(CONF_ADAPTIVE_POLLING, True)
+    storage_key = server_storage_key(data)
+    coordinators = server["coordinators"] = {
+        "objects": CheckPointObjectsCoordinator(
+            hass, api, None, data.get(CONF_OBJECTS_INTERVAL, DEFAULT_OBJECTS_INTERVAL),
+            incremental=data.get(CONF_INCREMENTAL_SYNC, True),
+            adaptive=adaptive,
+            storage_key=storage_key
+        ),
+        "status": CheckPointStatusCoordinator(
+            hass, api, None, data.get(CONF_STATUS_INTERVAL, DEFAULT_STATUS_INTERVAL),
+            adaptive=adaptive,
+            storage_key=storage_key
+        ),
+    }
+
+    # No entry: these tiers outlive the entry that happened to start them
+    await asyncio.gather(*(coordinator.async_start() for coordinator in coordinators.values()))
+
+    async def async_keepalive(now):
+        await api.keepalive()
+
+    # Publish and discard act on the shared session, so every entry's rule writes go through one batcher
+    server["batcher"] = CheckPointRuleBatcher(hass, api)
+
+    # Push events are server-wide; each entry's rules coordinator subscribes to the one receiver
+    server["push"] = CheckPointPushReceiver(hass)
+    server["push"].publish_coordinators.add(coordinators["objects"])
+
+    # Keeps the SID alive between slow polls so we never pay for another login
+    server["unsub_keepalive"] = async_track_time_interval(
+        hass, async_keepalive, timedelta(seconds=api.session_timeout / 3)
+    )
+
+async def async_release_server(hass, entry):
+    """Drop the entry's reference; the last entry on a server logs out and closes what nobody else uses."""
+    servers = hass.data[DOMAIN]["servers"]
+    key = server_key(entry.data)
+    server = servers.get(key)
+    if server is None:
+        return
+    server["entries"].discard(entry.entry_id)
+    if server["entries"]:
+        return
+
+    servers.pop(key)
+    if not server["setup"].done():
+        server["setup"].cancel()
+    if "unsub_keepalive" in server:
+        server["unsub_keepalive"]()
+    if "push" in server:
+        server["push"].stop()
+    if "batcher" in server:
+        await server["batcher"].async_shutdown()
+    for coordinator in server.get("coordinators", {}).values():
+        await coordinator.async_shutdown()
+
+    api = server.get("api")
+    if api is None:
+        return
+    await api.logout()
+    await api.close()
+
+    transports = hass.data[DOMAIN]["transports"]
+    transport = transports[transport_key(entry.data)]
+    transport["servers"] -= 1
+    if transport["servers"] <= 0:
+        transports.pop(transport_key(entry.data))
+        await transport["session"].close()
@@ -0,0 +1,116 @@
+import contextvars
+import time
+from collections import deque
+from .const import STATS_WINDOW
+
+# The refresh cycle whose requests we are counting; child tasks of a tier refresh inherit it
+_current_cycle = contextvars.ContextVar("checkpoint_management_cycle", default=None)
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class EndpointStats:
+    """Rolling window of the last STATS_WINDOW calls to one endpoint."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=STATS_WINDOW)
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.last_status = None
+
+    def record(self, duration, size, status, retries):
+        self.samples.append((duration, size))
+        self.calls += 1
+        if retries:
+            self.retries += 1
+        self.last_status = status
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+
+    def summary(self):
+        durations = [duration for duration, _ in self.samples]
+        sizes = [size for _, size in self.samples]
+        if not durations:
+            return {"calls": self.calls, "errors": self.errors}
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "last_status": self.last_status,
+            "avg_s": round(sum(durations) / len(durations), 4),
+            "p50_s": round(_percentile(durations, 0.5), 4),
+            "p95_s": round(_percentile(durations, 0.95), 4),
+            "max_s": round(max(durations), 4),
+            "last_s": round(durations[-1], 4),
+            "avg_bytes": int(sum(sizes) / len(sizes)),
+            "max_bytes": max(sizes),
+        }
+
+class ApiStats:
+    """Per-endpoint histograms plus session and error counters for one API client."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.requests = 0
+        self.cache_hits = 0
+        self.logins = 0
+        self.last_error = None
+        self.last_error_endpoint = None
+        self.last_error_at = None
+
+    def record(self, endpoint, duration, size, status, retries=0, error=None, throttled=False):
+        self.endpoints.setdefault(endpoint, EndpointStats()).record(duration, size, status, retries)
+        self.requests += 1
+        if endpoint == "login" and error is None:
+            self.logins += 1
+        if error is not None:
+            self.last_error = error
+            self.last_error_endpoint = endpoint
+            self.last_error_at = time.time()
+
+        cycle = _current_cycle.get()
+        if cycle is not None:
+            cycle["requests"] += 1
+            cycle["bytes"] += size
+            if error is not None:
+                cycle["errors"] += 1
+            if throttled:
+                cycle["throttled"] += 1
+
+    def begin_cycle(self):
+        cycle = {"requests": 0, "bytes": 0, "errors": 0, "throttled": 0}
+        return cycle, _current_cycle.set(cycle)
+
+    def end_cycle(self, token):
+        _current_cycle.reset(token)
+
+    @property
+    def sid_reuse_rate(self):
+        """Share of session-bound requests that did not need a fresh login, in percent."""
+        if not self.requests:
+            return None
+        return round(100 * (1 - self.logins / self.requests), 1)
+
+    def slowest_endpoint(self):
+        slowest = None
+        for endpoint, stats in self.endpoints.items():
+            if not stats.samples:
+                continue
+            last = stats.samples[-1][0]
+            if slowest is None or last > slowest[1]:
+                slowest = (endpoint, last)
+        return slowest
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "logins": self.logins,
+            "sid_reuse_rate": self.sid_reuse_rate,
+            "last_error": self.last_error,
+            "last_error_endpoint": self.last_error_endpoint,
+            "last_error_at": self.last_error_at,
+            "endpoints": {endpoint: stats.summary() for endpoint, stats in sorted(self.endpoints.items())},
+        }
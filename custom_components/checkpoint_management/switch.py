@@ -1,47 +1,43 @@
 import logging
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.const import CONF_HOST
 from .const import DOMAIN
+from .lifecycle import CheckPointEntityReconciler
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
-    api = hass.data[DOMAIN][entry.entry_id]["api"]
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinators"]["rules"]
+    batcher = hass.data[DOMAIN][entry.entry_id]["batcher"]
     package = hass.data[DOMAIN][entry.entry_id]["package"]
     host = entry.data[CONF_HOST]
-    
-    rules = coordinator.data.get("rules", [])
-    
-    if not rules:
-        return
-
-    switches = []
-    
-    for rule in rules:
-        switches.append(CheckPointRuleSwitch(coordinator, api, package, rule, host, entry.entry_id))
-        
-    async_add_entities(switches)
+
+    # Rules added to or deleted from the package gain or lose their switch without a reload
+    await CheckPointEntityReconciler(
+        hass, entry, coordinator, "switch", f"cp_{entry.entry_id}_rule_",
+        items=lambda data: data.get("rules"),
+        key=lambda rule: rule.uid,
+        factory=lambda rule: CheckPointRuleSwitch(coordinator, batcher, package, rule, host, entry.entry_id),
+        async_add_entities=async_add_entities,
+    ).async_start()
 
 class CheckPointRuleSwitch(SwitchEntity):
-    def __init__(self, coordinator, api, package, rule_data, host, entry_id):
+    def __init__(self, coordinator, batcher, package, rule_data, host, entry_id):
         self.coordinator = coordinator
-        self.api = api
+        self.batcher = batcher
         self.package = package
         self.host = host
         self.entry_id = entry_id
-        self.rule_uid = rule_data.get("uid")
-        
+        self.rule_uid = rule_data.uid
+
         # CHANGED: Capture the specific layer this rule belongs to
-        self.rule_layer = rule_data.get("layer_name", "Network")
-        
-        rule_name = rule_data.get("name")
-        if not rule_name:
-            rule_name = f"Rule {rule_data.get('rule-number')}"
-            
-        self._attr_name = f"Rule: {rule_name}"
-        self._attr_unique_id = f"cp_rule_{self.rule_uid}"
+        self.rule_layer = rule_data.layer or "Network"
+
+        self._attr_name = f"Rule: {rule_data.display_name}"
+        # Scoped to the entry, since packages on one server can share a layer and with it the rule
+        self._attr_unique_id = f"cp_{entry_id}_rule_{self.rule_uid}"
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -59,56 +55,30 @@ class CheckPointRuleSwitch(SwitchEntity):
 
     @property
     def is_on(self):
-        rules = self.coordinator.data.get("rules", [])
-        for rule in rules:
-            if rule.get("uid") == self.rule_uid:
-                return rule.get("enabled", False)
-        return False
+        desired = self.batcher.desired_state(self.rule_uid)
+        if desired is not None:
+            return desired
+
+        rule = self.coordinator.data.get("rule_index", {}).get(self.rule_uid)
+        if rule is None:
+            return False
+        return bool(rule.enabled)
 
     @property
     def extra_state_attributes(self):
-        rules = self.coordinator.data.get("rules", [])
-        for rule in rules:
-            if rule.get("uid") == self.rule_uid:
-                # CHANGED: Added the layer name to the attributes UI
-                attributes = {
-                    "policy_package": self.package,
-                    "layer": self.rule_layer
-                }
-                
-                for key, value in rule.items():
-                    if key in ["uid", "name", "enabled", "type", "rule-number", "layer_name"]:
-                        continue
-                        
-                    if isinstance(value, list) and all(isinstance(i, dict) and "name" in i for i in value):
-                        attributes[key] = ", ".join([i["name"] for i in value])
-                    elif isinstance(value, dict) and "name" in value:
-                        attributes[key] = value["name"]
-                    elif key == "hits" and isinstance(value, dict):
-                        attributes["hits_last_hour"] = value.get("value", 0)
-                        attributes["hits_percentage"] = value.get("percentage")
-                        if "last-date" in value and isinstance(value["last-date"], dict):
-                            attributes["last_hit"] = value["last-date"].get("iso-8601")
-                        else:
-                            attributes["last_hit"] = value.get("last-date")
-                    else:
-                        attributes[key] = value
-                return attributes
-        return {}
+        attributes = self.coordinator.rule_attributes(self.rule_uid)
+        change_state = self.batcher.change_state(self.rule_uid)
+        if change_state:
+            return {**attributes, "change_state": change_state}
+        return attributes
 
     @property
     def should_poll(self):
         return False
 
     async def _toggle_rule(self, state: bool):
-        await self.api.login()
-        # CHANGED: Pass the specific layer string to the toggle command
-        await self.api.set_access_rule_state(self.rule_uid, self.rule_layer, state)
-        await self.api.publish()
-        await self.api.install_policy(self.package)
-        await self.api.logout()
-        
-        await self.coordinator.async_request_refresh()
+        # Queued rather than applied, so a burst of flips shares one publish and one install
+        self.batcher.async_queue(self.rule_uid, self.rule_layer, state, self.coordinator)
 
     async def async_turn_on(self, **kwargs):
         await self._toggle_rule(True)
@@ -117,4 +87,5 @@ class CheckPointRuleSwitch(SwitchEntity):
         await self._toggle_rule(False)
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(self.coordinator.async_add_change_listener(self.async_write_ha_state, ("rule", self.rule_uid)))
+        self.async_on_remove(self.batcher.async_add_listener(self.rule_uid, self.async_write_ha_state))